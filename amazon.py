@@ -1,59 +1,375 @@
-import requests
+import re
+import statistics
+
+import soupsieve
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+from matcher import ACCESSORY_TOKENS, tokens
+from replay import http_transport
+
+# Result-item fields as CSS selectors, compiled once for the soup backends.
+ITEM_SELECTOR = ".s-main-slot .s-result-item"
+FIELD_SELECTORS = {
+    "title": "h2 .a-text-normal",
+    "price": ".a-price-whole",
+    "price_fraction": ".a-price-fraction",
+    "rating": ".a-icon-alt",
+    "product_url": "h2 a.a-link-normal",
+    "brand_name": "#bylineInfo_feature_div",
+    "sponsored": ".puis-sponsored-label-text, .s-sponsored-label-text, .puis-label-popover-default",
+}
+SPONSORED_CLASSES = ("puis-sponsored-label-text", "s-sponsored-label-text", "puis-label-popover-default")
+
+
+def _product(title, price, price_fraction, rating, href, brand_name, sponsored=False):
+    return {
+        "title": title,
+        "price": price + price_fraction,
+        "rating": rating,
+        "product_url": f"https://www.amazon.ca{href}",
+        "brand_name": brand_name or "N/A",
+        "sponsored": sponsored,
+    }
+
+
+class SoupBackend:
+    # BeautifulSoup with "html.parser" (pure Python) or "lxml" as tree builder
+    def __init__(self, features="html.parser"):
+        # fail here, like the other backends' imports, rather than with
+        # bs4.FeatureNotFound on the first parse
+        if builder_registry.lookup(features) is None:
+            raise ImportError(f"BeautifulSoup has no {features} tree builder installed")
+        self.features = features
+        self.item_selector = soupsieve.compile(ITEM_SELECTOR)
+        self.selectors = {name: soupsieve.compile(css) for name, css in FIELD_SELECTORS.items()}
+
+    def parse(self, html):
+        return BeautifulSoup(html, self.features)
+
+    def items(self, doc):
+        return self.item_selector.iselect(doc)
+
+    def extract(self, item):
+        found = {name: selector.select_one(item) for name, selector in self.selectors.items()}
+        if not (found["title"] and found["price"] and found["rating"] and found["product_url"]):
+            return None
+        return _product(
+            found["title"].get_text(strip=True),
+            found["price"].get_text(strip=True),
+            found["price_fraction"].get_text(strip=True) if found["price_fraction"] else "",
+            found["rating"].get_text(strip=True),
+            found["product_url"]["href"],
+            found["brand_name"].get_text(strip=True) if found["brand_name"] else None,
+            found["sponsored"] is not None,
+        )
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlBackend:
+    # lxml.html with precompiled XPath equivalents of FIELD_SELECTORS
+    # bytes fed to the pull parser at a time by iter_products
+    chunk_size = 16384
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+        self.etree = etree
+        self.lxml_html = lxml_html
+        self.item_xpath = etree.XPath(f"//*[{_has_class('s-main-slot')}]//*[{_has_class('s-result-item')}]")
+        self.xpaths = {
+            "title": etree.XPath(f"(.//h2//*[{_has_class('a-text-normal')}])[1]"),
+            "price": etree.XPath(f"(.//*[{_has_class('a-price-whole')}])[1]"),
+            "price_fraction": etree.XPath(f"(.//*[{_has_class('a-price-fraction')}])[1]"),
+            "rating": etree.XPath(f"(.//*[{_has_class('a-icon-alt')}])[1]"),
+            "product_url": etree.XPath(f"(.//h2//a[{_has_class('a-link-normal')}])[1]"),
+            "brand_name": etree.XPath("(.//*[@id='bylineInfo_feature_div'])[1]"),
+            "sponsored": etree.XPath(f"(.//*[{' or '.join(_has_class(name) for name in SPONSORED_CLASSES)}])[1]"),
+        }
+
+    def parse(self, html):
+        return self.lxml_html.fromstring(html)
+
+    def items(self, doc):
+        return self.item_xpath(doc)
+
+    def iter_products(self, html):
+        # Incremental parse: yields products as their result item closes, so
+        # a caller that only needs the first few never parses the rest of
+        # the page.
+        parser = self.etree.HTMLPullParser(events=("end",), tag="div")
+        for offset in range(0, len(html), self.chunk_size):
+            parser.feed(html[offset:offset + self.chunk_size])
+            for _, element in parser.read_events():
+                if "s-result-item" not in (element.get("class") or "").split():
+                    continue
+                if not any("s-main-slot" in (parent.get("class") or "").split()
+                           for parent in element.iterancestors()):
+                    continue
+                product = self.extract(element)
+                if product:
+                    yield product
+
+    @staticmethod
+    def _text(element):
+        # same as BeautifulSoup's get_text(strip=True)
+        return "".join(text.strip() for text in element.itertext())
+
+    def extract(self, item):
+        found = {}
+        for name, xpath in self.xpaths.items():
+            matches = xpath(item)
+            found[name] = matches[0] if matches else None
+        if found["title"] is None or found["price"] is None or found["rating"] is None \
+                or found["product_url"] is None:
+            return None
+        return _product(
+            self._text(found["title"]),
+            self._text(found["price"]),
+            self._text(found["price_fraction"]) if found["price_fraction"] is not None else "",
+            self._text(found["rating"]),
+            found["product_url"].get("href"),
+            self._text(found["brand_name"]) if found["brand_name"] is not None else None,
+            found["sponsored"] is not None,
+        )
+
+
+class SelectolaxBackend:
+    # selectolax (lexbor) parser; CSS matching happens in C
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self.parser_class = LexborHTMLParser
+
+    def parse(self, html):
+        return self.parser_class(html)
+
+    def items(self, doc):
+        return doc.css(ITEM_SELECTOR)
+
+    def extract(self, item):
+        found = {name: item.css_first(css) for name, css in FIELD_SELECTORS.items()}
+        if not (found["title"] and found["price"] and found["rating"] and found["product_url"]):
+            return None
+        return _product(
+            found["title"].text(deep=True, strip=True),
+            found["price"].text(deep=True, strip=True),
+            found["price_fraction"].text(deep=True, strip=True) if found["price_fraction"] else "",
+            found["rating"].text(deep=True, strip=True),
+            found["product_url"].attributes.get("href"),
+            found["brand_name"].text(deep=True, strip=True) if found["brand_name"] else None,
+            found["sponsored"] is not None,
+        )
+
+
+PARSER_BACKENDS = {
+    "html.parser": lambda: SoupBackend("html.parser"),
+    "soup-lxml": lambda: SoupBackend("lxml"),
+    "lxml": LxmlBackend,
+    "selectolax": SelectolaxBackend,
+}
+
+_backends = {}
+
+
+def get_backend(name):
+    backend = _backends.get(name)
+    if backend is None:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {name}")
+        backend = _backends[name] = PARSER_BACKENDS[name]()
+    return backend
+
+
+def available_parsers():
+    names = []
+    for name in PARSER_BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def best_parser(max_items=None):
+    # selectolax is fastest over a whole page; lxml's incremental parse wins
+    # when only the first few items are wanted
+    preferred = ("lxml", "selectolax") if max_items is not None else ("selectolax", "lxml")
+    for name in preferred:
+        try:
+            get_backend(name)
+            return name
+        except ImportError:
+            pass
+    return "html.parser"
+
+
+def parse_price(product):
+    try:
+        return float(product["price"].replace(",", ""))
+    except (KeyError, ValueError, AttributeError):
+        return None
+
+
+# Titles naming something other than the product itself: "case for X",
+# "compatible with X", or an accessory noun the query doesn't ask for
+_FOR_RE = re.compile(r"\b(?:for|compatible with|fits|designed for)\b", re.IGNORECASE)
+# (an accessory search result is still worth flagging when it's a cable
+# or charger, which matcher keeps as products in their own right)
+ACCESSORY_WORDS = ACCESSORY_TOKENS | {"charger", "cable", "adapter", "remote", "battery"}
+ACCESSORY_PENALTY = 0.4
+
+
+def is_accessory(query, title):
+    # read on the raw title: matcher.tokens drops "for" as a stopword
+    query_tokens = set(tokens(query))
+    if not query_tokens:
+        return False
+    if ACCESSORY_WORDS & (set(tokens(title)) - query_tokens):
+        return True
+    parts = _FOR_RE.split(title, maxsplit=1)
+    if len(parts) < 2 or _FOR_RE.search(query):
+        return False
+    # "<something> for <the query>": the query is what it fits, not what it is
+    before = len(query_tokens & set(tokens(parts[0])))
+    return before * 2 < len(query_tokens) <= 2 * len(query_tokens & set(tokens(parts[1])))
+
+
+def title_similarity(query, title):
+    # how much of the query the title covers (Amazon titles are long), with
+    # a small share for how much of the title is the query to break ties
+    # between otherwise equal titles, less ACCESSORY_PENALTY when the title
+    # is an accessory for the product rather than the product
+    query_tokens = set(tokens(query))
+    title_tokens = set(tokens(title))
+    if not query_tokens or not title_tokens:
+        return 0.0
+    shared = len(query_tokens & title_tokens)
+    score = 0.9 * shared / len(query_tokens) + 0.1 * shared / len(title_tokens)
+    if is_accessory(query, title):
+        score -= ACCESSORY_PENALTY
+    return score
+
+
+def rank_products(products, query, top_n=10, confident=0.9, min_similarity=0.7, sponsored_penalty=0.15,
+                  min_seen=3):
+    # Picks the product best matching query from an iterable of products,
+    # consuming it lazily: it stops after top_n products, or once a
+    # non-sponsored product scores at least `confident`, strictly ahead of
+    # every other product, after min_seen products (a tie is not
+    # confident). Sponsored results have sponsored_penalty taken off their
+    # score. Products under min_similarity (accessories included) are
+    # ignored, and the rest give the price statistics.
+    # Returns {"product", "score", "min_price", "median_price",
+    # "price_count", "inspected"}; product is None without a match.
+    best, best_score, runner_up = None, 0.0, 0.0
+    prices = []
+    inspected = 0
+    for product in products:
+        inspected += 1
+        similarity = title_similarity(query, product["title"])
+        price = parse_price(product)
+        if similarity >= min_similarity and price is not None:
+            prices.append(price)
+            score = similarity - (sponsored_penalty if product.get("sponsored") else 0.0)
+            if score > best_score:
+                best, best_score, runner_up = product, score, best_score
+            elif score > runner_up:
+                runner_up = score
+        if inspected >= top_n:
+            break
+        if best is not None and not best.get("sponsored") and best_score >= confident \
+                and best_score > runner_up and inspected >= min_seen:
+            break
+    return {
+        "product": best,
+        "score": best_score,
+        "min_price": min(prices) if prices else None,
+        "median_price": statistics.median(prices) if prices else None,
+        "price_count": len(prices),
+        "inspected": inspected,
+    }
 
 
 class AmazonScraper:
-    def __init__(self, user_agent):
+    def __init__(self, user_agent, rate_limiter=None, parser="html.parser", max_items=None, transport=None):
         self.headers = {
             "User-Agent": user_agent,
             "Accept-Language": "en-US,en;q=0.9",
         }
+        # optional ratelimit.HostRateLimiter shared between scrapers
+        self.rate_limiter = rate_limiter
+        # parser: a PARSER_BACKENDS name; max_items stops extraction once
+        # that many complete products have been found
+        self.backend = get_backend(parser)
+        self.max_items = max_items
+        # (url, headers) -> (status_code, content); see replay.py for
+        # recording and offline replay
+        self.transport = transport or http_transport
 
     def get_html(self, url):
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.content
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        status_code, content = self.transport(url, self.headers)
+        if status_code == 200:
+            return content
         else:
-            print(f"Failed to retrieve the page: {response.status_code}")
+            print(f"Failed to retrieve the page: {status_code}")
             return None
 
     def parse_html(self, html):
-        soup = BeautifulSoup(html, "html.parser")
-        return soup
+        return self.backend.parse(html)
+
+    def search_url(self, product_name):
+        return f"https://www.amazon.ca/s?k={product_name.replace(' ', '+')}"
 
     def search_product(self, product_name):
-        search_url = f"https://www.amazon.ca/s?k={product_name.replace(' ', '+')}"
-        html = self.get_html(search_url)
+        html = self.get_html(self.search_url(product_name))
         if html:
             return self.parse_html(html)
         return None
 
-    def extract_product_info(self, soup):
+    def extract_product_info(self, soup, max_items=None):
+        max_items = max_items if max_items is not None else self.max_items
         products = []
-        for item in soup.select(".s-main-slot .s-result-item"):
-            title = item.select_one("h2 .a-text-normal")
-            price = item.select_one(".a-price-whole")
-            price_fraction = item.select_one(".a-price-fraction")
-            rating = item.select_one(".a-icon-alt")
-            product_url = item.select_one("h2 a.a-link-normal")
-            brand_name = item.select_one("#bylineInfo_feature_div")
-
-            if title and price and rating and product_url:
-                products.append({
-                    "title": title.get_text(strip=True),
-                    "price": price.get_text(strip=True)+price_fraction.get_text(strip=True),
-                    "rating": rating.get_text(strip=True),
-                    "product_url": f"https://www.amazon.ca{product_url['href']}",
-                    "brand_name": brand_name.get_text(strip=True) if brand_name else "N/A"
-                })
+        for item in self.backend.items(soup):
+            product = self.backend.extract(item)
+            if product:
+                products.append(product)
+                if max_items is not None and len(products) >= max_items:
+                    break
 
         return products
 
-    def scrape(self, product_name):
-        soup = self.search_product(product_name)
-        if soup:
-            products = self.extract_product_info(soup)
+    def extract_from_html(self, html, max_items=None):
+        max_items = max_items if max_items is not None else self.max_items
+        if max_items is not None and hasattr(self.backend, "iter_products"):
+            products = []
+            for product in self.backend.iter_products(html):
+                products.append(product)
+                if len(products) >= max_items:
+                    break
             return products
+        return self.extract_product_info(self.parse_html(html), max_items)
+
+    def iter_products(self, html):
+        # products lazily, incrementally parsed where the backend can
+        if hasattr(self.backend, "iter_products"):
+            return self.backend.iter_products(html)
+        return filter(None, map(self.backend.extract, self.backend.items(self.parse_html(html))))
+
+    def scrape_ranked(self, product_name, **rank_kwargs):
+        # rank_products over the search results for product_name; parsing
+        # stops where ranking does
+        html = self.get_html(self.search_url(product_name))
+        return rank_products(self.iter_products(html) if html else (), product_name, **rank_kwargs)
+
+    def scrape(self, product_name):
+        html = self.get_html(self.search_url(product_name))
+        if html:
+            return self.extract_from_html(html)
         return []
 
 
@@ -1,32 +1,85 @@
+import os
 import requests
 from bs4 import BeautifulSoup
 from pytrends.request import TrendReq
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from amazon import AmazonScraper
+from amazon import AmazonScraper, best_parser, parse_price
+from matcher import ProductIndex
+from price_cache import PriceCache
+from ratelimit import HostRateLimiter
+from scoring import CONDITION_MULTIPLIERS, DEFAULT_CONDITION_MULTIPLIER
+from singleflight import SingleFlight
 
 # 1. Define Constants and API Headers
 USER_AGENT = "Your User-Agent"
-CACHED_PRICES = {}  # Dictionary to cache prices to reduce redundant API calls
+# Cache prices to reduce redundant API calls. Entries expire after
+# PRICE_CACHE_TTL seconds; set PRICE_CACHE_PATH to keep them on disk and
+# share them between worker processes.
+PRICE_CACHE = PriceCache(
+    max_entries=int(os.getenv("PRICE_CACHE_SIZE", 5000)),
+    ttl=float(os.getenv("PRICE_CACHE_TTL", 10 * 24 * 3600)),
+    path=os.getenv("PRICE_CACHE_PATH"),
+    on_evict=lambda key: PRODUCT_INDEX.remove(key, key),
+)
+# Shared by every scraper so concurrent lookups stay under a per-host request
+# rate; set RATE_LIMIT_PATH to a directory to share the budget between
+# worker processes too
+AMAZON_RATE_LIMITER = HostRateLimiter(rate=2.0, capacity=4, path=os.getenv("RATE_LIMIT_PATH"))
+# Cache keys of titles already priced, for matching relisted products
+# without scraping; PRODUCT_MATCH_THRESHOLD is the cosine similarity a new
+# title needs to reuse a price. Keys leave it when PRICE_CACHE drops them, and
+# PRODUCT_INDEX_SIZE caps it when the cache lives on disk.
+PRODUCT_INDEX = ProductIndex(threshold=float(os.getenv("PRODUCT_MATCH_THRESHOLD", 0.7)),
+                             max_entries=int(os.getenv("PRODUCT_INDEX_SIZE", 50000)))
+for _key in PRICE_CACHE.keys():
+    PRODUCT_INDEX.add(_key, _key)
+# Concurrent lookups of the same product share one in-flight scrape
+AMAZON_LOOKUPS = SingleFlight()
+# Results ranked per lookup; ranking stops early on a confident match
+AMAZON_TOP_N = 10
+# Fastest installed HTML parser for reading only the first few results
+AMAZON_PARSER = best_parser(max_items=AMAZON_TOP_N)
 
 # 2. Function to Scrape Amazon Prices (Optimized)
 
 
+def normalize_product_key(product_name):
+    return " ".join(product_name.lower().split())
+
+
 def get_amazon_price_and_url(product_name):
-    if product_name in CACHED_PRICES:
-        return CACHED_PRICES[product_name]
-    scrapper = AmazonScraper("")
-    details = scrapper.scrape(product_name)
-    if not details[0]:
+    key = normalize_product_key(product_name)
+    cached = PRICE_CACHE.get(key)
+    if cached is not None:
+        return cached
+    match = PRODUCT_INDEX.match(key)
+    if match is not None:
+        # the matched title's price, unless it has expired since
+        cached = PRICE_CACHE.get(match[0], count=False)
+        if cached is not None:
+            return cached
+    return AMAZON_LOOKUPS.do(key, _scrape_amazon_price, product_name, key)
+
+
+def _scrape_amazon_price(product_name, key):
+    # a flight that finished just before ours started may have filled the cache
+    cached = PRICE_CACHE.get(key, count=False)
+    if cached is not None:
+        return cached
+    scrapper = AmazonScraper("", rate_limiter=AMAZON_RATE_LIMITER, parser=AMAZON_PARSER)
+    ranked = scrapper.scrape_ranked(product_name, top_n=AMAZON_TOP_N)
+    product = ranked["product"]
+    if product is None:
         raise Exception('could not do things')
-    product = details[0]
-    try:
-        price = float(product['price'])
-        CACHED_PRICES[product_name] = product['price']  # Cache the price
-        print('got price', price)
-        return {"price": price, "product": product}
-    except AttributeError:
-        return None
+    price = parse_price(product)
+    result = {"price": price, "product": product, "min_price": ranked["min_price"],
+              "median_price": ranked["median_price"]}
+    PRICE_CACHE.set(key, result)  # Cache the price
+    PRODUCT_INDEX.add(key, key)
+    print('got price', price)
+    return result
 
 # 3. Function to Analyze Google Trends (With Throttling to Save API Calls)
 
@@ -45,14 +98,7 @@ def get_google_trends_score(product_name):
 
 
 def adjust_price_for_condition(base_price, condition):
-    condition_multiplier = {
-        "New": 1.0,
-        "Like New": 0.9,
-        "Used - Very Good": 0.8,
-        "Used - Good": 0.7,
-        "Used - Acceptable": 0.5,
-    }
-    return base_price * condition_multiplier.get(condition, 0.5)
+    return base_price * CONDITION_MULTIPLIERS.get(condition, DEFAULT_CONDITION_MULTIPLIER)
 
 # 5. Function to Calculate Total Cost and Profit Margin
 
@@ -76,14 +122,18 @@ def is_good_to_resell(product_name, resale_price, total_cost, trends_score, min_
 
 
 def analyze_product(product_name, base_price, condition, shipping=0, fees=0):
-    # Step 1: Adjust price based on condition
-    adjusted_price = adjust_price_for_condition(base_price, condition)
-
-    # Step 2: Get the Amazon price (cached to save API calls)
+    # Step 1: Get the Amazon price (cached to save API calls)
     try:
         am = get_amazon_price_and_url(product_name)
     except:
         return {"ok": False}
+    return evaluate_product(product_name, base_price, condition, am, shipping, fees)
+
+
+def evaluate_product(product_name, base_price, condition, am, shipping=0, fees=0):
+    # Step 2: Adjust price based on condition
+    adjusted_price = adjust_price_for_condition(base_price, condition)
+
     if am is None or "price" not in am:
         print(f"Could not find Amazon price for {product_name}")
         return {"ok": False}
@@ -104,6 +154,37 @@ def analyze_product(product_name, base_price, condition, shipping=0, fees=0):
         print(f"Not worth reselling: {product_name}")
         return {"ok": False}
 
+
+def _lookup_amazon_price(product_name):
+    try:
+        return get_amazon_price_and_url(product_name)
+    except Exception as e:
+        print(f"Amazon lookup failed for {product_name}: {e}")
+        return None
+
+
+def analyze_products(batch, max_workers=8):
+    # Batch version of analyze_product. Each item is a dict of
+    # analyze_product keyword arguments or a tuple of its positional ones.
+    # Every distinct (normalized) product name is looked up once, lookups
+    # run on a bounded pool (AMAZON_RATE_LIMITER keeps them under the
+    # per-host rate) and results come back in input order.
+    items = [item if isinstance(item, dict) else dict(zip(
+        ("product_name", "base_price", "condition", "shipping", "fees"), item)) for item in batch]
+    names = {}
+    for item in items:
+        names.setdefault(normalize_product_key(item["product_name"]), item["product_name"])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        prices = dict(zip(names, executor.map(_lookup_amazon_price, names.values())))
+
+    return [
+        evaluate_product(item["product_name"], item["base_price"], item["condition"],
+                         prices[normalize_product_key(item["product_name"])], item.get("shipping", 0),
+                         item.get("fees", 0))
+        for item in items
+    ]
+
 # 8. Example Execution
 # if __name__ == "__main__":
 #     product_name = "Echo Dot (3rd Gen)"
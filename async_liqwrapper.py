@@ -0,0 +1,181 @@
+import asyncio
+from collections import deque
+
+import aiohttp
+
+from liqwrapper import (build_headers, current_bids_variables, graphql_error, lot_bid_variables,
+                        lot_search_variables, parse_bid_result, status_error)
+from queries import (CURRENT_BIDS_QUERY, LOT_BID_QUERY, LOT_SEARCH_QUERY, build_current_bids_query,
+                     build_lot_search_query)
+from resilience import DEFAULT_TIMEOUT, BreakerRegistry, CircuitOpenError, FetchError, RetryPolicy
+
+
+class AsyncApiWrapper:
+    # asyncio counterpart of ApiWrapper. Every call goes through one
+    # aiohttp session (a single connection pool) and a global semaphore,
+    # so many auctions can be watched from one event loop without
+    # exceeding max_concurrency requests in flight.
+    def __init__(self, base_url: str, auth_token: str = None, pool_size: int = 100, per_host_limit: int = 16,
+                 max_concurrency: int = 16, retry: RetryPolicy = None, breakers: BreakerRegistry = None,
+                 rate_limiter=None, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url
+        # same retry, circuit breaker and (connect, read) timeout rules as
+        # ApiWrapper
+        self.retry = retry or RetryPolicy()
+        self.breakers = breakers or BreakerRegistry()
+        # optional ratelimit.HostRateLimiter, as for ApiWrapper; waits are
+        # slept on the event loop
+        self.rate_limiter = rate_limiter
+        self.headers = build_headers(auth_token)
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session = None
+
+    def _get_session(self):
+        # created lazily because aiohttp sessions must be built inside a running loop
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host_limit)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def fetch_graphql(self, query: str, variables: dict, operation_name: str):
+        # Raises FetchError (CircuitOpenError while the operation's circuit
+        # is open) once retries are exhausted or not allowed
+        session = self._get_session()
+        breaker = self.breakers.get((self.base_url, operation_name))
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise CircuitOpenError(operation_name, breaker.retry_in())
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(self.base_url, operation_name)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            try:
+                async with self.semaphore:
+                    async with session.post(
+                        self.base_url,
+                        json={
+                            "operationName": operation_name,
+                            "variables": variables,
+                            "query": query
+                        },
+                    ) as response:
+                        if response.status < 400:
+                            data = await response.json(content_type=None)
+                            error = graphql_error(data, operation_name)
+                            if error is None:
+                                breaker.record()
+                                return data
+                        else:
+                            error = status_error(response.status, response.reason,
+                                                 response.headers.get("Retry-After"), operation_name)
+            except aiohttp.ClientError as e:
+                # only a connection that was never opened is certainly unsent
+                unsent = isinstance(e, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError))
+                error = FetchError(f"Failed to fetch data: {e}", operation_name, maybe_sent=not unsent)
+            except asyncio.TimeoutError as e:
+                error = FetchError(f"Failed to fetch data: timed out {e}", operation_name)
+            except BaseException as e:
+                # a cancelled task or an unexpected error still settles the
+                # breaker (see ApiWrapper.fetch_graphql)
+                breaker.record(FetchError(f"Request aborted: {e!r}", operation_name))
+                raise
+
+            breaker.record(error)
+            delay = self.retry.next_delay(error, attempt)
+            if delay is None:
+                print(f"Fetch Error: {error}")
+                raise error
+            await asyncio.sleep(delay)
+
+    async def bid_on_lot(self, lot_id: int, bid_amount: float, re_confirmed: bool):
+        # as ApiWrapper.bid_on_lot, a FetchError with maybe_sent set means
+        # the bid may have been placed
+        data = await self.fetch_graphql(LOT_BID_QUERY, lot_bid_variables(lot_id, bid_amount, re_confirmed), "LotBid")
+        return parse_bid_result(data)
+
+    async def get_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, fields=None):
+        # every page of current bids; auction_id 0 means all auctions
+        return [lot async for lot in self.iter_current_bids(auction_id, buyer_lot_status_group, hide_closed_lots,
+                                                            fields=fields)]
+
+    async def search_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False,
+                                  page_number=1, page_length=100, fields=None):
+        variables = current_bids_variables(auction_id, buyer_lot_status_group, hide_closed_lots, page_number,
+                                           page_length)
+        # fields as for search_auction_products; "bids" is the dashboard set
+        query = CURRENT_BIDS_QUERY if fields is None else build_current_bids_query(fields)
+        data = await self.fetch_graphql(query, variables, "CurrentBidsSearch")
+        return data["data"]["currentBids"]
+
+    def iter_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, page_length=100,
+                          fields=None):
+        def fetch(page_number):
+            return self.search_current_bids(auction_id, buyer_lot_status_group, hide_closed_lots, page_number,
+                                            page_length, fields)
+        return self._iter_pages(fetch, page_length)
+
+    async def search_auction_products(self, auction_id, category=-1, page_number=1, page_length=100, search_text=None,
+                                      fields=None):
+        variables = lot_search_variables(auction_id, category, page_number, page_length, search_text)
+        # fields: dotted lot field paths or a preset name such as "slim";
+        # None keeps the full LOT_SEARCH_QUERY selection
+        query = LOT_SEARCH_QUERY if fields is None else build_lot_search_query(fields)
+        results = await self.fetch_graphql(query, variables, "LotSearch")
+        return results["data"]["lotSearch"]
+
+    def iter_auction_products(self, auction_id, category=-1, page_length=100, fields=None):
+        def fetch(page_number):
+            return self.search_auction_products(auction_id, category=category, page_number=page_number,
+                                                page_length=page_length, fields=fields)
+        return self._iter_pages(fetch, page_length)
+
+    async def _iter_pages(self, fetch, page_length):
+        # fetch(page_number) is a coroutine returning a result with
+        # pagedResults. Page 1 gives filteredCount; later pages are started
+        # at most 2 * max_concurrency ahead of the page being yielded
+        # (requests are further bounded by the shared semaphore) and
+        # awaited in page order, which keeps the server's order.
+        data = await fetch(1)
+        results = data['pagedResults']['results']
+        for result in results:
+            yield result
+
+        page_count = -(-data['pagedResults']['filteredCount'] // page_length)
+        if not results or page_count <= 1:
+            return
+
+        window = 2 * self.max_concurrency
+        tasks = deque()
+        next_page = 2
+        try:
+            while tasks or next_page <= page_count:
+                while next_page <= page_count and len(tasks) < window:
+                    tasks.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+                data = await tasks.popleft()
+                for result in data['pagedResults']['results']:
+                    yield result
+        finally:
+            # wait for the cancelled pages so none outlives the generator
+            # or leaves an exception unretrieved
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,669 @@
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import itertools
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+from amazon import AmazonScraper, available_parsers
+from async_liqwrapper import AsyncApiWrapper
+from liqwrapper import ApiWrapper, lot_search_variables
+from lot_store import LotStore
+from matcher import ProductIndex
+from models import parse_lots
+from replay import FixtureArchive, ReplayTransport
+from resilience import BreakerRegistry, FetchError, RetryPolicy
+from sniper import BidScheduler
+from snapshot_store import SnapshotStore
+from queries import LOT_SEARCH_QUERY, build_lot_search_query
+from scoring import CONDITIONS, condition_codes, score_batch
+from stub_server import StubHiBidServer, make_auction, make_lot
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - start
+
+
+def report(label, iterations, elapsed):
+    print(f"{label:<28} {iterations:>6} calls  {elapsed:8.3f}s  {iterations / elapsed:10.1f} req/s")
+
+
+def bench_pool(args):
+    # Compares a bare requests.post per operation (the old fetch_graphql)
+    # against ApiWrapper's pooled keep-alive session.
+    with StubHiBidServer(lot_count=args.page_length) as server:
+        api = ApiWrapper(server.url)
+        payload = {
+            "operationName": "LotSearch",
+            "variables": {"auctionId": 1, "pageNumber": 1, "pageLength": args.page_length},
+            "query": "query LotSearch { __typename }",
+        }
+
+        def bare():
+            response = requests.post(server.url, headers=api.headers, json=payload)
+            response.raise_for_status()
+            response.json()
+
+        def pooled():
+            api.fetch_graphql(payload["query"], payload["variables"], "LotSearch")
+
+        # warm up both paths so neither pays first-call import/setup costs
+        bare()
+        pooled()
+
+        report("requests.post (no pool)", args.iterations, timed(bare, args.iterations))
+        with api:
+            report("ApiWrapper session (pooled)", args.iterations, timed(pooled, args.iterations))
+
+
+def bench_crawl(args):
+    # Serial vs parallel iter_auction_products over a stub auction whose
+    # every page costs args.latency seconds of server time.
+    with StubHiBidServer(lot_count=args.lots, latency=args.latency) as server, ApiWrapper(server.url) as api:
+        for label, parallel in (("serial", False), ("parallel", True)):
+            start = time.perf_counter()
+            lots = list(api.iter_auction_products(1, page_length=args.page_length, parallel=parallel,
+                                                  max_workers=args.workers))
+            elapsed = time.perf_counter() - start
+            in_order = all(int(a["lotNumber"]) < int(b["lotNumber"]) for a, b in zip(lots, lots[1:]))
+            print(f"{label:<10} {len(lots):>6} lots  {elapsed:8.3f}s  in order: {in_order}")
+
+
+def bench_projection(args):
+    # Bytes on the wire and json decode time for one LotSearch page with the
+    # full selection set vs the "slim" projection.
+    with StubHiBidServer(lot_count=args.page_length) as server, ApiWrapper(server.url) as api:
+        variables = lot_search_variables(1, page_length=args.page_length)
+        for label, query in (("full", LOT_SEARCH_QUERY), ("slim", build_lot_search_query("slim"))):
+            payload = {"operationName": "LotSearch", "variables": variables, "query": query}
+            body = api.session.post(server.url, headers=api.headers, json=payload).content
+            parse_times = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                json.loads(body)
+                parse_times.append(time.perf_counter() - start)
+            parse_ms = statistics.median(parse_times) * 1000
+            print(f"{label:<6} {len(body):>10} bytes/page  {parse_ms:8.3f} ms parse/page")
+
+
+def decoded_pages(lot_count, page_length=100):
+    # lots as fetch_graphql hands them over: each page json-decoded on its
+    # own, so every lot owns a separate copy of its auction
+    auction = make_auction(1, lot_count)
+    for start in range(1, lot_count + 1, page_length):
+        page = [make_lot(auction, n) for n in range(start, min(start + page_length, lot_count + 1))]
+        yield from json.loads(json.dumps(page))
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_memory(args):
+    _, raw = measure(lambda: list(decoded_pages(args.lots)))
+    print(f"{'raw dicts':<20} {raw / 1024 / 1024:8.2f} MiB for {args.lots} lots")
+
+    def normalized():
+        store = LotStore()
+        for _ in store.add_lots(decoded_pages(args.lots)):
+            pass
+        return store
+
+    _, size = measure(normalized)
+    print(f"{'LotStore':<20} {size / 1024 / 1024:8.2f} MiB for {args.lots} lots")
+
+    # lots are parsed page by page as they arrive, so only one decoded page
+    # is alive at a time alongside the models
+    _, size = measure(lambda: list(parse_lots(decoded_pages(args.lots))))
+    print(f"{'models.Lot':<20} {size / 1024 / 1024:8.2f} MiB for {args.lots} lots")
+
+
+def bench_snapshot(args):
+    # bulk write of a crawl into SnapshotStore, then a warm-start reload
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshots.db")
+        lots = list(decoded_pages(args.lots))
+        with SnapshotStore(path, batch_size=args.batch_size) as store:
+            start = time.perf_counter()
+            store.save(lots)
+            print(f"{'write':<8} {len(lots):>6} lots  {(time.perf_counter() - start) * 1000:9.1f} ms")
+        with SnapshotStore(path) as store:
+            start = time.perf_counter()
+            loaded = store.load(1)
+            print(f"{'reload':<8} {len(loaded):>6} lots  {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+def make_search_page(item_count=48, sponsored_every=4):
+    # synthetic amazon.ca search page shaped like the real one: a results
+    # slot of s-result-item blocks, each wrapped in layout noise
+    items = []
+    for n in range(item_count):
+        noise = "".join(f'<div class="a-section a-spacing-none puis-padding-{i}"><span class="a-size-base">'
+                        f'{"filler " * 8}</span></div>' for i in range(12))
+        sponsored = '<span class="puis-label-popover-default">Sponsored</span>' if n % sponsored_every == 0 else ""
+        items.append(
+            f'<div data-asin="B0{n:08d}" data-component-type="s-search-result" class="sg-col s-result-item s-asin">'
+            f'<div class="s-card-container">{noise}{sponsored}'
+            f'<h2 class="a-size-mini"><a class="a-link-normal s-link-style" href="/dp/B0{n:08d}">'
+            f'<span class="a-size-medium a-color-base a-text-normal">Echo Dot (3rd Gen) Smart speaker variant {n}</span>'
+            f'</a></h2>'
+            f'<div class="a-row"><i class="a-icon a-icon-star-small"><span class="a-icon-alt">4.{n % 10} out of 5 stars'
+            f'</span></i></div>'
+            f'<span class="a-price"><span class="a-price-whole">{29 + n}.</span><span class="a-price-fraction">99'
+            f'</span></span>{noise}</div></div>'
+        )
+    head = "<script>" + "var x = 1;" * 5000 + "</script>"
+    return (f'<html><head>{head}</head><body><div id="search"><div class="s-main-slot s-result-list">'
+            f'{"".join(items)}</div></div></body></html>').encode()
+
+
+def load_search_pages(fixtures):
+    if fixtures:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(fixtures, "*.html"))):
+            with open(path, "rb") as f:
+                pages.append(f.read())
+        return pages
+    return [make_search_page()]
+
+
+def bench_parse(args):
+    # items/sec per parser backend over saved (or synthetic) search pages,
+    # extracting every item and stopping after the first
+    pages = load_search_pages(args.fixtures)
+    print(f"{len(pages)} page(s), {sum(len(p) for p in pages) / 1024:.0f} KiB")
+    for parser in available_parsers():
+        for max_items in (None, 1):
+            scraper = AmazonScraper("", parser=parser, max_items=max_items)
+            items = 0
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                for page in pages:
+                    items += len(scraper.extract_from_html(page))
+            elapsed = time.perf_counter() - start
+            label = f"{parser} (max_items={max_items})"
+            print(f"{label:<32} {items / elapsed:10.1f} items/s  {elapsed / (args.iterations * len(pages)) * 1000:8.2f} ms/page")
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def synthetic_archive(path, count=20):
+    archive = FixtureArchive(path)
+    scraper = AmazonScraper("")
+    for n in range(count):
+        archive.add(scraper.search_url(f"synthetic product {n}"), 200, make_search_page(item_count=16 + n % 40))
+    return archive
+
+
+def bench_scrape(args):
+    # AmazonScraper.scrape (or scrape_ranked with --ranked) over a recorded
+    # fixture archive (see replay.py), served offline, with latency
+    # percentiles per parser backend
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = FixtureArchive(args.archive) if args.archive else synthetic_archive(os.path.join(tmp, "fixtures.zip"))
+        products = [parse_qs(urlparse(url).query)["k"][0] for url in archive.urls()]
+        transport = ReplayTransport(archive, strict=True)
+        for url in archive.urls():
+            transport(url, {})  # load every body before timing
+        print(f"{len(products)} recorded searches")
+
+        for parser in available_parsers():
+            scraper = AmazonScraper("", parser=parser, max_items=args.max_items, transport=transport)
+            samples = []
+            for _ in range(args.iterations):
+                for product in products:
+                    start = time.perf_counter()
+                    if args.ranked:
+                        scraper.scrape_ranked(product, top_n=args.max_items or 10)
+                    else:
+                        scraper.scrape(product)
+                    samples.append((time.perf_counter() - start) * 1000)
+            p50, p95, p99 = percentiles(samples)
+            print(f"{parser:<12} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms")
+
+
+def drive(fn, iterations, concurrency):
+    # runs fn `iterations` times over `concurrency` threads; a call that
+    # raises or returns None counts as an error
+    def call(_):
+        start = time.perf_counter()
+        try:
+            ok = fn() is not None
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    # the client prints on every failure (and the serial iterator on every
+    # page); keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(call, range(iterations)))
+    wall = time.perf_counter() - start
+    samples = [elapsed * 1000 for elapsed, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    return wall, samples, errors
+
+
+def bench_load(args):
+    # drives ApiWrapper against the stub server and reports throughput and
+    # latency percentiles per operation
+    with StubHiBidServer(lot_count=args.lots, auction_count=args.auctions, latency=args.latency,
+                         latency_jitter=args.jitter, error_rate=args.error_rate,
+                         current_bid_count=args.current_bids, seed=1) as server, \
+            ApiWrapper(server.url, pool_maxsize=max(16, args.concurrency * 8)) as api:
+        auction_ids = list(server.auctions)
+        lot_ids = list(server.lots_by_id)
+        amounts = itertools.count(1000)
+
+        operations = {
+            "iter_auction_products": lambda: list(api.iter_auction_products(
+                auction_ids[next(amounts) % len(auction_ids)], parallel=args.parallel)),
+            "get_current_bids": api.get_current_bids,
+            "bid_on_lot": lambda: api.bid_on_lot(lot_ids[next(amounts) % len(lot_ids)], next(amounts), True),
+        }
+        print(f"{'operation':<24} {'calls':>6} {'errors':>6} {'calls/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, fn in operations.items():
+            iterations = args.sweeps if name == "iter_auction_products" else args.iterations
+            wall, samples, errors = drive(fn, iterations, args.concurrency)
+            p50, p95, p99 = percentiles(samples)
+            print(f"{name:<24} {len(samples):>6} {errors:>6} {len(samples) / wall:9.1f} {p50:9.2f} {p95:9.2f} {p99:9.2f}")
+
+
+def bench_snipe(args):
+    # arms every lot of a stub auction closing over the next few seconds and
+    # reports how far from the planned instant each bid was actually sent
+    with StubHiBidServer(lot_count=args.lots, duration=args.fire_before + 2, stagger=args.stagger,
+                         latency=args.latency) as server, \
+            ApiWrapper(server.url, pool_maxsize=args.workers) as api, \
+            BidScheduler(api, max_workers=args.workers, warm_lead=args.fire_before) as scheduler:
+        for lot in server.lots:
+            scheduler.arm(lot["id"], 500, fire_before=args.fire_before, auction_id=server.auction["id"])
+        scheduler.refresh_auction(server.auction["id"])
+        while scheduler.pending():
+            time.sleep(0.1)
+        time.sleep(args.fire_before)
+        statuses = {}
+        for armed in scheduler.armed.values():
+            status = armed.result["bidStatus"] if armed.result else None
+            statuses[status] = statuses.get(status, 0) + 1
+        print(f"rtt estimate {scheduler.rtt * 1000:.2f} ms, bid statuses {statuses}")
+        print(", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                        for key, value in scheduler.jitter_report().items()))
+
+
+def bench_score(args):
+    # analyze's scalar per-item arithmetic vs one score_batch pass over the
+    # same columns (prints and lookups excluded from both)
+    from analyze import adjust_price_for_condition, calculate_profit_margin, calculate_total_cost
+
+    rng = random.Random(1)
+    conditions = CONDITIONS + ("Unknown",)
+    rows = [(rng.uniform(5, 200), rng.choice(conditions), rng.uniform(0, 20), 2.0, rng.uniform(5, 400))
+            for _ in range(args.items)]
+
+    def scalar():
+        results = []
+        for base_price, condition, shipping, fees, amazon_price in rows:
+            total_cost = calculate_total_cost(adjust_price_for_condition(base_price, condition), shipping, fees)
+            margin = calculate_profit_margin(amazon_price, total_cost)
+            results.append((margin, margin / total_cost * 100 >= 20))
+        results.sort(key=lambda result: -result[0])
+        return results
+
+    base_prices, condition_names, shipping, fees, amazon_prices = zip(*rows)
+    columns = (base_prices, condition_codes(condition_names), amazon_prices, shipping, fees)
+
+    def columnar():
+        return score_batch(*columns)
+
+    report("scalar", args.iterations, timed(scalar, args.iterations))
+    report("score_batch", args.iterations, timed(columnar, args.iterations))
+    # once the columns are already arrays (e.g. built while paging)
+    columns = tuple(np.asarray(column) for column in columns)
+    report("score_batch (arrays)", args.iterations, timed(columnar, args.iterations))
+
+
+# (relisted title, title it was priced under): should match
+NEAR_DUPLICATES = (
+    ("Echo Dot 3rd Gen - Charcoal", "Amazon Echo Dot (3rd Gen)"),
+    ("Anker PowerCore 10000 Portable Charger", "Anker PowerCore 10000 Power Bank, Black"),
+    ("Ninja AF101 Air Fryer 4 Quart", "Ninja AF101 Air Fryer, 4 Qt, Grey"),
+    ("Bose QuietComfort 45 Headphones Black", "Bose QuietComfort 45 Bluetooth Wireless Noise Cancelling Headphones"),
+    ("Logitech MX Master 3S Mouse", "Logitech MX Master 3S - Wireless Performance Mouse, Graphite"),
+    ("JBL Flip 5 Waterproof Speaker Blue", "JBL Flip 5 Portable Bluetooth Speaker"),
+    ("Instant Pot Duo 7-in-1 6 Quart", "Instant Pot Duo 7-in-1 Electric Pressure Cooker, 6 Qt"),
+    ("Fire TV Stick 4K", "Amazon Fire TV Stick 4K streaming device"),
+    ("Kindle Paperwhite 11th Gen 8GB", "Kindle Paperwhite (8 GB) 11th Generation Black"),
+)
+# (new title, indexed title): different products, should not match
+NEAR_MISSES = (
+    ("Echo Dot 4th Gen", "Amazon Echo Dot (3rd Gen)"),
+    ("Anker PowerCore 20000 Power Bank", "Anker PowerCore 10000 Power Bank, Black"),
+    ("Ninja AF161 Air Fryer", "Ninja AF101 Air Fryer, 4 Qt, Grey"),
+    ("Bose QuietComfort 35 II Headphones", "Bose QuietComfort 45 Bluetooth Wireless Noise Cancelling Headphones"),
+    ("Logitech MX Anywhere 3S Mouse", "Logitech MX Master 3S - Wireless Performance Mouse, Graphite"),
+    ("JBL Flip 6 Bluetooth Speaker", "JBL Flip 5 Portable Bluetooth Speaker"),
+    ("Fire TV Stick Lite", "Amazon Fire TV Stick 4K streaming device"),
+    ("Kindle Oasis 10th Gen", "Kindle Paperwhite (8 GB) 11th Generation Black"),
+    ("Case for Kindle Paperwhite 11th Gen", "Kindle Paperwhite (8 GB) 11th Generation Black"),
+    # base models against their premium variants
+    ("Samsung Galaxy S21", "Samsung Galaxy S21 Ultra 5G"),
+    ("Apple iPhone 13", "Apple iPhone 13 Pro Max"),
+    ("Apple AirPods", "Apple AirPods Pro"),
+    ("PS5 Console", "PS5 Digital Edition Console"),
+    ("Nintendo Switch", "Nintendo Switch OLED Model"),
+    ("Apple iPhone 13 Mini", "Apple iPhone 13 Pro Max"),
+    ("Apple iPad 9th Gen 64GB", "Apple iPad 9th Gen 256GB"),
+)
+
+
+def bench_match(args):
+    # ProductIndex lookup time and accuracy over synthetic titles: relisted
+    # titles (reworded, colour or store name added or dropped, lot-number
+    # noise) should match, unseen models should not; the hand-written
+    # NEAR_DUPLICATES and NEAR_MISSES pairs are checked against the same
+    # index
+    rng = random.Random(2)
+    brands = ("Sony", "Samsung", "Anker", "Logitech", "Apple", "Bose", "JBL", "Philips", "Dyson", "Ninja")
+    kinds = ("Wireless Headphones", "Bluetooth Speaker", "USB-C Charger", "Gaming Mouse", "Air Fryer", "Smart Watch")
+    colours = ("Black", "White", "Charcoal", "Grey")
+    listings = [(rng.choice(brands), rng.choice(kinds), f"{rng.choice('ABCDEFGH')}{n}", rng.choice(colours))
+                for n in rng.sample(range(100, 1000000), args.entries)]
+    titles = [f"{brand} {kind} {model} - {colour}" for brand, kind, model, colour in listings]
+    start = time.perf_counter()
+    index = ProductIndex(threshold=args.threshold)
+    for title in titles:
+        index.add(title, title)
+    for _, title in NEAR_DUPLICATES + NEAR_MISSES:
+        index.add(title, title)
+    print(f"indexed {len(index)} titles in {time.perf_counter() - start:.2f}s")
+
+    relisted = []
+    for n, (brand, kind, model, colour) in enumerate(rng.sample(listings, args.queries)):
+        words = kind.split()
+        variants = (
+            f"{brand} {model} {kind} #{n}",
+            f"{brand} {kind} {model} ({rng.choice(colours)})",
+            f"Amazon {brand} {words[-1]} {model}, {colour}",
+            f"{kind} by {brand} - Model {model} - Customer Return",
+        )
+        relisted.append((rng.choice(variants), f"{brand} {kind} {model} - {colour}"))
+    unseen = [(f"{rng.choice(brands)} {rng.choice(kinds)} Z{n}", None) for n in range(args.queries)]
+    for label, queries in (("relisted", relisted), ("pairs", NEAR_DUPLICATES), ("unseen", unseen),
+                           ("misses", [(query, None) for query, _ in NEAR_MISSES])):
+        samples = []
+        matched = 0
+        wrong = 0
+        for query, expected in queries:
+            start = time.perf_counter()
+            match = index.match(query)
+            samples.append((time.perf_counter() - start) * 1e6)
+            matched += match is not None
+            wrong += match is not None and match[0] != expected
+        p50, p95, p99 = percentiles(samples)
+        print(f"{label:<9} matched {matched:>5}/{len(queries)} ({wrong} wrong)  "
+              f"p50 {p50:7.1f} us  p95 {p95:7.1f} us  p99 {p99:7.1f} us")
+
+
+def bench_resilience(args):
+    # Behaviour checks for the retry policy, circuit breaker, LotBid
+    # idempotency and request timeouts against the stub with injected
+    # failures; prints one line per check and exits non-zero if any fail
+    failures = 0
+
+    def check(label, ok, detail):
+        nonlocal failures
+        failures += not ok
+        print(f"{label:<36} {'ok' if ok else 'FAILED':<7} {detail}")
+
+    def sent(server):
+        return server.request_count + server.error_count
+
+    def search(api):
+        return api.fetch_graphql(LOT_SEARCH_QUERY, lot_search_variables(1, 1, 10), "LotSearch")
+
+    retry = RetryPolicy(max_attempts=4, base_delay=0.01)
+    with StubHiBidServer(lot_count=10, error_rate=0.3, seed=3) as server:
+        api = ApiWrapper(server.url, retry=retry, breakers=BreakerRegistry(failure_threshold=100))
+        succeeded = 0
+        for _ in range(args.calls):
+            with contextlib.suppress(FetchError):
+                search(api)
+                succeeded += 1
+        check("retries hide transient 503s", succeeded == args.calls and server.error_count > 0,
+              f"{succeeded}/{args.calls} calls, {sent(server)} requests, {server.error_count} injected failures")
+
+    with StubHiBidServer(lot_count=10, error_rate=1.0, error_status=429, retry_after=0.2) as server:
+        api = ApiWrapper(server.url, retry=retry, breakers=BreakerRegistry(failure_threshold=100))
+        start = time.perf_counter()
+        with contextlib.suppress(FetchError):
+            search(api)
+        elapsed = time.perf_counter() - start
+        check("Retry-After is honoured", sent(server) == retry.max_attempts and elapsed >= 0.6,
+              f"{sent(server)} requests in {elapsed:.2f}s (3 waits of 0.2s expected)")
+
+        server.error_count = 0
+        with contextlib.suppress(FetchError):
+            api.bid_on_lot(1, 5.0, True)
+        check("LotBid retried after a 429", server.error_count == retry.max_attempts, f"{server.error_count} attempts")
+
+    with StubHiBidServer(lot_count=10, error_rate=1.0, error_status=503) as server:
+        api = ApiWrapper(server.url, retry=retry, breakers=BreakerRegistry(failure_threshold=100))
+        with contextlib.suppress(FetchError):
+            api.bid_on_lot(1, 5.0, True)
+        check("LotBid not retried after a 503", sent(server) == 1, f"{sent(server)} request(s)")
+
+        breakers = BreakerRegistry(failure_threshold=3, reset_timeout=0.3)
+        api = ApiWrapper(server.url, retry=RetryPolicy(max_attempts=1), breakers=breakers)
+        before = sent(server)
+        errors = []
+        for _ in range(6):
+            try:
+                search(api)
+            except FetchError as e:
+                errors.append(type(e).__name__)
+        check("breaker opens after 3 failures", sent(server) - before == 3 and errors.count("CircuitOpenError") == 3,
+              f"{sent(server) - before} requests, {errors.count('CircuitOpenError')} failed fast")
+        time.sleep(0.35)
+        server.error_rate = 0.0
+        search(api)
+        state = breakers.get((server.url, "LotSearch")).state
+        check("half-open probe closes the breaker", state == "closed", state)
+
+    with StubHiBidServer(lot_count=10, graphql_errors=("LotBid", "LotSearch")) as server:
+        api = ApiWrapper(server.url, retry=retry, breakers=BreakerRegistry(failure_threshold=1))
+        raised = []
+        calls = (lambda: api.bid_on_lot(1, 5.0, True), lambda: search(api), lambda: list(api.iter_auction_products(1)))
+        for call in calls:
+            try:
+                call()
+            except Exception as e:
+                raised.append(type(e).__name__)
+        states = set(api.breakers.states().values())
+        check("GraphQL errors raise FetchError", raised == ["FetchError"] * 3 and sent(server) == 3 and
+              states == {"closed"}, f"{raised}, {sent(server)} requests, breakers {sorted(states)}")
+
+    with StubHiBidServer(lot_count=10, latency=args.hang) as server:
+        api = ApiWrapper(server.url, retry=RetryPolicy(max_attempts=2, base_delay=0.01), timeout=(1.0, 0.2))
+        start = time.perf_counter()
+        try:
+            search(api)
+            error = None
+        except FetchError as e:
+            error = e
+        elapsed = time.perf_counter() - start
+        check("read timeout bounds a hung request", error is not None and elapsed < args.hang,
+              f"gave up after {elapsed:.2f}s, {sent(server)} requests (server takes {args.hang}s)")
+        before = sent(server)
+        try:
+            api.bid_on_lot(1, 5.0, True)
+            error = None
+        except FetchError as e:
+            error = e
+        check("LotBid read timeout is maybe_sent", error is not None and error.maybe_sent and sent(server) - before == 1,
+              f"{sent(server) - before} request(s), maybe_sent={getattr(error, 'maybe_sent', None)}")
+
+        async def hung_async():
+            async_api = AsyncApiWrapper(server.url, retry=RetryPolicy(max_attempts=1), timeout=(1.0, 0.2))
+            try:
+                await async_api.fetch_graphql(LOT_SEARCH_QUERY, lot_search_variables(1, 1, 10), "LotSearch")
+            except FetchError as e:
+                return e
+            finally:
+                await async_api.close()
+
+        start = time.perf_counter()
+        error = asyncio.run(hung_async())
+        elapsed = time.perf_counter() - start
+        check("async read timeout", error is not None and elapsed < args.hang, f"gave up after {elapsed:.2f}s")
+
+        async def cancelled_probe():
+            # a half-open probe cancelled mid-request must not leave the
+            # circuit open for good
+            breakers = BreakerRegistry(failure_threshold=1, reset_timeout=0.1)
+            async_api = AsyncApiWrapper(server.url, retry=RetryPolicy(max_attempts=1), breakers=breakers)
+            breaker = breakers.get((server.url, "LotSearch"))
+            breaker.record(FetchError("injected", "LotSearch"))
+            await asyncio.sleep(0.15)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    async_api.fetch_graphql(LOT_SEARCH_QUERY, lot_search_variables(1, 1, 10), "LotSearch"), 0.1)
+            await asyncio.sleep(0.15)
+            try:
+                return breaker.allow()
+            finally:
+                await async_api.close()
+
+        check("cancelled probe releases the breaker", asyncio.run(cancelled_probe()), "probe allowed again")
+
+    with StubHiBidServer(lot_count=2000, latency=0.01, error_rate=0.05, error_status=400, seed=4) as server:
+        async def failed_crawl():
+            # a page failing mid-crawl must not leave later page tasks
+            # running once the generator is closed
+            async_api = AsyncApiWrapper(server.url, retry=RetryPolicy(max_attempts=1), max_concurrency=4)
+            seen = 0
+            try:
+                async for _ in async_api.iter_auction_products(1, page_length=20):
+                    seen += 1
+            except FetchError:
+                pass
+            leftover = len(asyncio.all_tasks()) - 1
+            await async_api.close()
+            return seen, leftover
+
+        seen, leftover = asyncio.run(failed_crawl())
+        check("async paging after a failed page", leftover == 0 and 0 < seen < 2000,
+              f"{seen} lots before the failure, {leftover} task(s) left")
+
+    if failures:
+        raise SystemExit(f"{failures} check(s) failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="liquidationmax benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pool = sub.add_parser("pool", help="requests/sec with and without the pooled session")
+    pool.add_argument("--iterations", type=int, default=500)
+    pool.add_argument("--page-length", type=int, default=10)
+    pool.set_defaults(func=bench_pool)
+
+    crawl = sub.add_parser("crawl", help="serial vs parallel iter_auction_products")
+    crawl.add_argument("--lots", type=int, default=2000)
+    crawl.add_argument("--page-length", type=int, default=100)
+    crawl.add_argument("--latency", type=float, default=0.2)
+    crawl.add_argument("--workers", type=int, default=8)
+    crawl.set_defaults(func=bench_crawl)
+
+    projection = sub.add_parser("projection", help="bytes and parse time per page, full vs slim fields")
+    projection.add_argument("--page-length", type=int, default=100)
+    projection.add_argument("--iterations", type=int, default=50)
+    projection.set_defaults(func=bench_projection)
+
+    memory = sub.add_parser("memory", help="resident size of a sweep as raw dicts, LotStore and models")
+    memory.add_argument("--lots", type=int, default=10000)
+    memory.set_defaults(func=bench_memory)
+
+    snapshot = sub.add_parser("snapshot", help="SnapshotStore bulk write and reload time")
+    snapshot.add_argument("--lots", type=int, default=5000)
+    snapshot.add_argument("--batch-size", type=int, default=500)
+    snapshot.set_defaults(func=bench_snapshot)
+
+    parse = sub.add_parser("parse", help="AmazonScraper parse throughput per parser backend")
+    parse.add_argument("--fixtures", help="directory of saved search-page .html files")
+    parse.add_argument("--iterations", type=int, default=20)
+    parse.set_defaults(func=bench_parse)
+
+    scrape = sub.add_parser("scrape", help="scrape latency percentiles over a replayed fixture archive")
+    scrape.add_argument("--archive", help="fixture archive recorded with replay.py (default: synthetic)")
+    scrape.add_argument("--max-items", type=int)
+    scrape.add_argument("--ranked", action="store_true", help="rank results, stopping at a confident match")
+    scrape.add_argument("--iterations", type=int, default=5)
+    scrape.set_defaults(func=bench_scrape)
+
+    load = sub.add_parser("load", help="throughput and latency of ApiWrapper operations against the stub server")
+    load.add_argument("--lots", type=int, default=500, help="lots per auction")
+    load.add_argument("--auctions", type=int, default=4)
+    load.add_argument("--latency", type=float, default=0.0)
+    load.add_argument("--jitter", type=float, default=0.0)
+    load.add_argument("--error-rate", type=float, default=0.0)
+    load.add_argument("--current-bids", type=int, default=50)
+    load.add_argument("--iterations", type=int, default=200)
+    load.add_argument("--sweeps", type=int, default=10)
+    load.add_argument("--concurrency", type=int, default=4)
+    load.add_argument("--parallel", action="store_true", help="use the parallel page fetcher for sweeps")
+    load.set_defaults(func=bench_load)
+
+    snipe = sub.add_parser("snipe", help="BidScheduler firing jitter against the stub server")
+    snipe.add_argument("--lots", type=int, default=30)
+    snipe.add_argument("--stagger", type=float, default=0.1, help="seconds between lot closes")
+    snipe.add_argument("--latency", type=float, default=0.005)
+    snipe.add_argument("--fire-before", type=float, default=1.0)
+    snipe.add_argument("--workers", type=int, default=32)
+    snipe.set_defaults(func=bench_snipe)
+
+    score = sub.add_parser("score", help="scalar vs vectorised profit scoring")
+    score.add_argument("--items", type=int, default=100000)
+    score.add_argument("--iterations", type=int, default=5)
+    score.set_defaults(func=bench_score)
+
+    match = sub.add_parser("match", help="ProductIndex match latency and hit rate")
+    match.add_argument("--entries", type=int, default=20000)
+    match.add_argument("--queries", type=int, default=1000)
+    match.add_argument("--threshold", type=float, default=0.7)
+    match.set_defaults(func=bench_match)
+
+    resilience = sub.add_parser("resilience", help="retry, circuit breaker, LotBid and timeout behaviour checks")
+    resilience.add_argument("--calls", type=int, default=50)
+    resilience.add_argument("--hang", type=float, default=2.0, help="seconds the stub takes in the timeout checks")
+    resilience.set_defaults(func=bench_resilience)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
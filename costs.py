@@ -0,0 +1,144 @@
+import re
+
+import numpy as np
+
+# What CostEngine reads from each lot
+COST_LOT_FIELDS = (
+    "id",
+    "shippingOffered",
+    "auction.id",
+    "auction.buyerPremium",
+    "auction.buyerPremiumRate",
+    "lotState.highBid",
+    "lotState.minBid",
+)
+
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+# "$2 per lot", "plus $1.50 lot fee", "$3.00/item"; only charges stated
+# per lot or item, not "$5 per invoice" or a handling fee
+_FLAT_FEE_RE = re.compile(r"\$\s*(\d+(?:\.\d+)?)\s*(?:(?:per|/|a|each)\s*(?:lot|item)s?\b|(?:lot|item) fee)",
+                          re.IGNORECASE)
+
+
+class FeeSchedule:
+    # What an auction adds to the hammer price, derived once from its
+    # buyerPremium text, buyerPremiumRate and shippingOffered (the premium
+    # is charged whether or not showBuyerPremium displays it).
+    # premium_rate is a fraction (0.15 for 15%); flat_fee is a per-lot
+    # charge some auctioneers add in the premium text.
+    __slots__ = ("auction_id", "premium_rate", "flat_fee", "shipping_offered")
+
+    def __init__(self, auction_id, premium_rate=0.0, flat_fee=0.0, shipping_offered=False):
+        self.auction_id = auction_id
+        self.premium_rate = premium_rate
+        self.flat_fee = flat_fee
+        self.shipping_offered = shipping_offered
+
+    @classmethod
+    def from_auction(cls, auction):
+        # auction: an auction dict (any subset of fields) or models.Auction
+        if not isinstance(auction, dict):
+            auction = {"id": auction.id, "buyerPremium": auction.buyer_premium,
+                       "buyerPremiumRate": auction.buyer_premium_rate}
+        text = auction.get("buyerPremium") or ""
+        rate = auction.get("buyerPremiumRate")
+        if rate is None:
+            # older auctions only state it in the text
+            match = _PERCENT_RE.search(text)
+            rate = float(match.group(1)) if match else 0.0
+        fee = _FLAT_FEE_RE.search(text)
+        return cls(
+            auction.get("id"),
+            premium_rate=rate / 100,
+            flat_fee=float(fee.group(1)) if fee else 0.0,
+            shipping_offered=bool(auction.get("shippingOffered")),
+        )
+
+    def __repr__(self):
+        return f"FeeSchedule(auction_id={self.auction_id!r}, premium_rate={self.premium_rate!r}, " \
+               f"flat_fee={self.flat_fee!r})"
+
+
+def lot_price(lot):
+    # price a lot can be had for now: highBid, or minBid when nobody has bid
+    state = lot.get("lotState") or {}
+    return state.get("highBid") or state.get("minBid") or 0
+
+
+class CostEngine:
+    # Landed cost of lots: hammer price plus buyer premium and per-lot fee,
+    # sales tax on both, plus shipping_cost for lots that ship (lots
+    # without shipping are picked up). Fee schedules are cached by
+    # auction id, so a sweep derives each auction's schedule once; an
+    # auction dict projected without buyerPremium and buyerPremiumRate
+    # isn't cached, so it can't pin a 0% premium on later complete ones.
+    def __init__(self, tax_rate=0.0, shipping_cost=0.0):
+        self.tax_rate = tax_rate
+        self.shipping_cost = shipping_cost
+        self.schedules = {}
+
+    def schedule(self, auction):
+        auction_id = auction.get("id") if isinstance(auction, dict) else auction.id
+        schedule = self.schedules.get(auction_id)
+        if schedule is None:
+            schedule = FeeSchedule.from_auction(auction)
+            if not isinstance(auction, dict) or "buyerPremium" in auction or "buyerPremiumRate" in auction:
+                self.schedules[auction_id] = schedule
+        return schedule
+
+    def cost(self, lot, price=None):
+        # landed cost of one lot dict at `price` (default lot_price(lot))
+        schedule = self.schedule(lot.get("auction") or {})
+        price = lot_price(lot) if price is None else price
+        ships = lot.get("shippingOffered")
+        ships = schedule.shipping_offered if ships is None else ships
+        return (price * (1 + schedule.premium_rate) + schedule.flat_fee) * (1 + self.tax_rate) + \
+            (self.shipping_cost if ships else 0.0)
+
+    def costs(self, lots, prices=None):
+        # landed costs of many lot dicts as one array; prices default to
+        # lot_price of each lot
+        count = len(lots)
+        hammer = np.fromiter((lot_price(lot) for lot in lots) if prices is None else prices, np.float64, count)
+        rates = np.empty(count)
+        fees = np.empty(count)
+        shipped = np.empty(count, dtype=bool)
+        for row, lot in enumerate(lots):
+            schedule = self.schedule(lot.get("auction") or {})
+            rates[row] = schedule.premium_rate
+            fees[row] = schedule.flat_fee
+            ships = lot.get("shippingOffered")
+            shipped[row] = schedule.shipping_offered if ships is None else ships
+        return (hammer * (1 + rates) + fees) * (1 + self.tax_rate) + shipped * self.shipping_cost
+
+    def evaluate(self, lots, amazon_prices, min_profit=20):
+        # Ranks lots by profit margin against their Amazon prices (aligned
+        # with lots, NaN when unknown). Returns columns sorted best first
+        # like scoring.score_batch, with "index" into lots and "lotId".
+        cost = self.costs(lots)
+        amazon_price = np.asarray(amazon_prices, dtype=np.float64)
+        profit = amazon_price - cost
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin_pct = np.where(cost > 0, profit / cost * 100, np.nan)
+        priced = ~np.isnan(margin_pct)
+        resell = priced & (margin_pct >= min_profit)
+        order = np.argsort(np.where(priced, -margin_pct, np.inf), kind="stable")
+        return {
+            "index": order,
+            "lotId": np.array([lots[row]["id"] for row in order], dtype=np.int64),
+            "cost": cost[order],
+            "amazon_price": amazon_price[order],
+            "profit": profit[order],
+            "margin_pct": margin_pct[order],
+            "resell": resell[order],
+        }
+
+    def evaluate_auction(self, api, auction_id, amazon_price, min_profit=20, **iter_kwargs):
+        # one call for a whole auction: pages every lot in (parallel, slim
+        # projection by default), prices each with amazon_price(lot) ->
+        # float or None, and returns (lots, evaluate table)
+        iter_kwargs.setdefault("parallel", True)
+        iter_kwargs.setdefault("fields", COST_LOT_FIELDS + ("lead", "description"))
+        lots = list(api.iter_auction_products(auction_id, **iter_kwargs))
+        prices = [amazon_price(lot) for lot in lots]
+        return lots, self.evaluate(lots, [np.nan if price is None else price for price in prices], min_profit)
@@ -0,0 +1,202 @@
+import csv
+import json
+from itertools import chain, islice
+
+from queries import check_fields
+
+# Streaming export of lots to CSV, JSONL or Parquet. Lots are consumed
+# lazily and written in fixed-size batches of flattened rows, so memory
+# stays flat no matter how many auctions are exported.
+#
+# A column spec is a list of dotted lot paths ("lotState.highBid") or
+# (column name, dotted path) pairs.
+
+DEFAULT_COLUMNS = (
+    ("lot_id", "id"),
+    ("lot_number", "lotNumber"),
+    ("auction_id", "auction.id"),
+    ("lead", "lead"),
+    ("description", "description"),
+    ("quantity", "quantity"),
+    ("high_bid", "lotState.highBid"),
+    ("min_bid", "lotState.minBid"),
+    ("bid_count", "lotState.bidCount"),
+    ("is_closed", "lotState.isClosed"),
+    ("time_left_seconds", "lotState.timeLeftSeconds"),
+    ("buyer_premium_rate", "auction.buyerPremiumRate"),
+    ("shipping_offered", "shippingOffered"),
+)
+
+# Parquet types of known lot paths; money is float64 whatever the first
+# values look like (an integer bid is still a price)
+COLUMN_TYPES = {
+    "id": "int64",
+    "lotNumber": "string",
+    "auction.id": "int64",
+    "lead": "string",
+    "description": "string",
+    "quantity": "int64",
+    "lotState.highBid": "float64",
+    "lotState.minBid": "float64",
+    "lotState.bidCount": "int64",
+    "lotState.isClosed": "bool",
+    "lotState.timeLeftSeconds": "float64",
+    "auction.buyerPremiumRate": "float64",
+    "shippingOffered": "bool",
+}
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def resolve_columns(columns=None):
+    if columns is None:
+        columns = DEFAULT_COLUMNS
+    resolved = []
+    for column in columns:
+        if isinstance(column, str):
+            name, path = column.replace(".", "_"), column
+        else:
+            name, path = column
+        resolved.append((name, tuple(path.split("."))))
+    return resolved
+
+
+def flatten(lot, columns):
+    row = []
+    for _, keys in columns:
+        value = lot
+        for key in keys:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        row.append(value)
+    return row
+
+
+def _batches(lots, columns, batch_size):
+    lots = iter(lots)
+    while True:
+        batch = [flatten(lot, columns) for lot in islice(lots, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _scalar(value):
+    # nested lists/dicts selected whole become JSON text in flat formats
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def _write_csv(batches, columns, path):
+    names = [name for name, _ in columns]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for batch in batches:
+            writer.writerows([_scalar(value) for value in row] for row in batch)
+
+
+def _write_jsonl(batches, columns, path):
+    names = [name for name, _ in columns]
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in batches:
+            f.write("".join(json.dumps(dict(zip(names, row)), separators=(",", ":")) + "\n" for row in batch))
+
+
+def _parquet_schema(pa, columns, batch=None):
+    # Known paths get their COLUMN_TYPES type. Others are inferred from the
+    # first batch, with integers widened to float64 and all-null columns
+    # written as strings, since later batches must fit the same schema.
+    # Without a batch (an empty export) unknown paths are strings.
+    fields = []
+    for i, (name, keys) in enumerate(columns):
+        alias = COLUMN_TYPES.get(".".join(keys))
+        if alias is not None:
+            fields.append(pa.field(name, pa.type_for_alias(alias)))
+            continue
+        if batch is None:
+            fields.append(pa.field(name, pa.string()))
+            continue
+        inferred = pa.array([_scalar(row[i]) for row in batch]).type
+        if pa.types.is_integer(inferred):
+            inferred = pa.float64()
+        elif not (pa.types.is_floating(inferred) or pa.types.is_boolean(inferred)):
+            inferred = pa.string()
+        fields.append(pa.field(name, inferred))
+    return pa.schema(fields)
+
+
+def _parquet_value(value, is_string):
+    value = _scalar(value)
+    if is_string and value is not None and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def _write_parquet(batches, columns, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+    writer = None
+    schema = None
+    try:
+        for batch in batches:
+            if schema is None:
+                schema = _parquet_schema(pa, columns, batch)
+                strings = [pa.types.is_string(field.type) for field in schema]
+                writer = pq.ParquetWriter(path, schema)
+            data = {name: [_parquet_value(row[i], strings[i]) for row in batch]
+                    for i, name in enumerate(schema.names)}
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+        if writer is None:
+            # no lots: still leave a readable file with the columns
+            pq.write_table(_parquet_schema(pa, columns).empty_table(), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+}
+
+
+def export_lots(lots, path, fmt=None, columns=None, batch_size=1000):
+    # fmt defaults to the file extension; returns the number of rows written
+    if fmt is None:
+        fmt = path.rsplit(".", 1)[-1].lower()
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+    columns = resolve_columns(columns)
+    count = 0
+
+    def counted(batches):
+        nonlocal count
+        for batch in batches:
+            count += len(batch)
+            yield batch
+
+    _WRITERS[fmt](counted(_batches(lots, columns, batch_size)), columns, path)
+    return count
+
+
+def export_auctions(api, auction_ids, path, fmt=None, columns=None, batch_size=1000, **iter_kwargs):
+    # lots are requested with a projection built from the column paths, so
+    # only exported fields come over the wire
+    columns = resolve_columns(columns)
+    fields = [".".join(keys) for _, keys in columns]
+    check_fields(fields)
+    lots = chain.from_iterable(
+        api.iter_auction_products(auction_id, fields=fields, **iter_kwargs) for auction_id in auction_ids
+    )
+    return export_lots(lots, path, fmt=fmt, columns=[(name, ".".join(keys)) for name, keys in columns],
+                       batch_size=batch_size)
@@ -1,10 +1,11 @@
 import csv
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 
 class ApiWrapper:
-    def __init__(self, base_url: str, auth_token: str = None):
+    def __init__(self, base_url: str, auth_token: str = None, pool_connections: int = 4, pool_maxsize: int = 16, pool_block: bool = False):
         self.base_url = base_url
 
         self.headers = {
@@ -24,10 +25,28 @@ class ApiWrapper:
         if auth_token:
             self.headers["authorization"] = f"Bearer {auth_token}"
 
+        # One keep-alive session for every operation so page sweeps and bids
+        # reuse pooled TCP/TLS connections instead of handshaking per request.
+        # pool_connections is the number of hosts kept, pool_maxsize the
+        # connections kept per host; pool_block makes pool_maxsize a hard limit.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def fetch_graphql(self, query: str, variables: dict, operation_name: str):
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.base_url,
                 headers=self.headers,
                 json={
@@ -1,672 +1,248 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from models import parse_lots
+from queries import (CURRENT_BIDS_QUERY, LOT_BID_QUERY, LOT_SEARCH_QUERY, build_current_bids_query,
+                     build_lot_search_query)
+from resilience import (DEFAULT_TIMEOUT, BreakerRegistry, CircuitOpenError, FetchError, RetryPolicy,
+                        parse_retry_after)
+
+
+def build_headers(auth_token: str = None):
+    headers = {
+        "accept": "application/json, text/plain, */*",
+        "accept-language": "en-US,en;q=0.9",
+        "content-type": "application/json",
+        "sec-ch-ua": "\"Not_A Brand\";v=\"8\", \"Chromium\";v=\"120\", \"Google Chrome\";v=\"120\"",
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-platform": "\"macOS\"",
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-origin",
+        "sec-gpc": "1",
+        "site_subdomain": "liquidationmaxinc.hibid.com"
+    }
+
+    if auth_token:
+        headers["authorization"] = f"Bearer {auth_token}"
+    return headers
+
+
+def lot_bid_variables(lot_id: int, bid_amount: float, re_confirmed: bool):
+    return {"lotId": lot_id, "bidAmount": bid_amount, "reConfirmed": re_confirmed}
+
+
+def current_bids_variables(auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, page_number=1,
+                           page_length=100):
+    return {
+        "isArchived": False,
+        "groupByAuction": True,
+        "auctionSortDirection": "ASC",
+        "hideClosedLots": hide_closed_lots,
+        "auctionId": auction_id,
+        "buyerLotStatusGroup": buyer_lot_status_group,
+        "sortOrder": "SALES_ORDER",
+        "monthRange": "THREE_MONTHS",
+        "sortDirection": "ASC",
+        "pageNumber": page_number,
+        "pageLength": page_length
+    }
+
+
+def lot_search_variables(auction_id, category=-1, page_number=1, page_length=100, search_text=None):
+    return {
+        "auctionId": auction_id,
+        "category": category,
+        "searchText": search_text,
+        "zip": "",
+        "miles": 50,
+        "shippingOffered": False,
+        "countryName": "",
+        "status": "ALL",
+        "sortOrder": "LOT_NUMBER",
+        "filter": "ALL",
+        "isArchive": False,
+        "countAsView": True,
+        "hideGoogle": False,
+        "pageNumber": page_number,
+        "pageLength": page_length
+    }
+
+
+def request_error(e, operation_name):
+    # FetchError for a requests exception; only a connection that was never
+    # opened guarantees the server did not see the request (a ReadTimeout
+    # may come after the server acted on it)
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    maybe_sent = not isinstance(e, requests.exceptions.ConnectTimeout) and not isinstance(reason, NewConnectionError)
+    return FetchError(f"Failed to fetch data: {e}", operation_name, maybe_sent=maybe_sent)
+
+
+def status_error(status, reason, retry_after, operation_name):
+    # a 429 is rejected before anything is done
+    return FetchError(f"Failed to fetch data: {status} {reason}", operation_name, status,
+                      parse_retry_after(retry_after), maybe_sent=status != 429)
+
+
+def graphql_error(data, operation_name):
+    # FetchError for a 200 response that carries GraphQL errors or no data.
+    # The server answered, so it is not retried and doesn't count against
+    # the breaker; a LotBid may still have been acted on.
+    if not isinstance(data, dict):
+        return FetchError(f"Unexpected response: {data!r:.200}", operation_name, 200)
+    errors = data.get("errors")
+    if not errors and data.get("data") is not None:
+        return None
+    messages = "; ".join(str(error.get("message", error)) if isinstance(error, dict) else str(error)
+                         for error in errors or ()) or "no data"
+    return FetchError(f"GraphQL error: {messages}", operation_name, 200)
+
+
+def parse_bid_result(data):
+    data = data.get('data') or {}
+    if 'bid' in data:
+        return data['bid']
+    elif 'InvalidInputErrors' in data:
+        return data['InvalidInputErrors']
+    else:
+        return None
+
 
 class ApiWrapper:
-    def __init__(self, base_url: str, auth_token: str = None):
+    def __init__(self, base_url: str, auth_token: str = None, pool_connections: int = 4, pool_maxsize: int = 16, pool_block: bool = False,
+                 retry: RetryPolicy = None, breakers: BreakerRegistry = None, rate_limiter=None,
+                 timeout=DEFAULT_TIMEOUT):
         self.base_url = base_url
+        # (connect, read) seconds per attempt, so a hung connection becomes
+        # a FetchError the retry policy and breaker see instead of a thread
+        # blocked forever
+        self.timeout = timeout
+        # Failed requests are retried per the RetryPolicy (never a LotBid
+        # that may have reached the server); each operation has a circuit
+        # breaker, so a failing endpoint fails fast instead of piling up
+        # retries. Pass a shared BreakerRegistry to pool breaker state.
+        self.retry = retry or RetryPolicy()
+        self.breakers = breakers or BreakerRegistry()
+        # optional ratelimit.HostRateLimiter, consulted with the operation
+        # name before every attempt; share one between wrappers (or a
+        # path-backed one between processes) to share the budget
+        self.rate_limiter = rate_limiter
 
-        self.headers = {
-            "accept": "application/json, text/plain, */*",
-            "accept-language": "en-US,en;q=0.9",
-            "content-type": "application/json",
-            "sec-ch-ua": "\"Not_A Brand\";v=\"8\", \"Chromium\";v=\"120\", \"Google Chrome\";v=\"120\"",
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": "\"macOS\"",
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-origin",
-            "sec-gpc": "1",
-            "site_subdomain": "liquidationmaxinc.hibid.com"
-        }
-
-        if auth_token:
-            self.headers["authorization"] = f"Bearer {auth_token}"
+        self.headers = build_headers(auth_token)
 
-    def fetch_graphql(self, query: str, variables: dict, operation_name: str):
+        # One keep-alive session for every operation so page sweeps and bids
+        # reuse pooled TCP/TLS connections instead of handshaking per request.
+        # pool_connections is the number of hosts kept, pool_maxsize the
+        # connections kept per host; pool_block makes pool_maxsize a hard limit.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
 
-        try:
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                json={
-                    "operationName": operation_name,  # Extracts operation name
-                    "variables": variables,
-                    "query": query
-                },
-            )
+    def __enter__(self):
+        return self
 
-            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-            return response.json()
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-        except requests.exceptions.RequestException as e:
-            print(f"Fetch Error: {e}")
-            raise Exception(f"Failed to fetch data: {e}")
+    def fetch_graphql(self, query: str, variables: dict, operation_name: str):
+        # Raises FetchError (CircuitOpenError while the operation's circuit
+        # is open) once retries are exhausted or not allowed
+        breaker = self.breakers.get((self.base_url, operation_name))
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise CircuitOpenError(operation_name, breaker.retry_in())
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self.base_url, operation_name)
+            try:
+                response = self.session.post(
+                    self.base_url,
+                    headers=self.headers,
+                    json={
+                        "operationName": operation_name,  # Extracts operation name
+                        "variables": variables,
+                        "query": query
+                    },
+                    timeout=self.timeout,
+                )
+                if response.status_code < 400:
+                    data = response.json()
+                    error = graphql_error(data, operation_name)
+                    if error is None:
+                        breaker.record()
+                        return data
+                else:
+                    error = status_error(response.status_code, response.reason, response.headers.get("Retry-After"),
+                                         operation_name)
+            except requests.exceptions.RequestException as e:
+                error = request_error(e, operation_name)
+            except BaseException as e:
+                # anything else still settles the breaker, or a half-open
+                # probe would never be released and the circuit stay open
+                breaker.record(FetchError(f"Request aborted: {e!r}", operation_name))
+                raise
+
+            breaker.record(error)
+            delay = self.retry.next_delay(error, attempt)
+            if delay is None:
+                print(f"Fetch Error: {error}")
+                raise error
+            time.sleep(delay)
 
     def bid_on_lot(self, lot_id: int, bid_amount: float, re_confirmed: bool):
-        query = """
-            mutation LotBid($lotId: Int!, $bidAmount: Decimal!, $reConfirmed: Boolean!) {
-                bid(input: { lotId: $lotId, bidAmount: $bidAmount, reConfirmed: $reConfirmed }) {
-                    __typename
-                    ... on BidResultType {
-                        bidStatus
-                        suggestedBid
-                        bidMessage
-                        lot {
-                            ...lotFull
-                            __typename
-                        }
-                        __typename
-                    }
-                    ...InvalidInputErrors
-                }
-            }
-
-            fragment lotFull on Lot {
-                id
-                description
-            }
-
-            fragment InvalidInputErrors on InvalidInputError {
-                messages
-                errors {
-                    fieldName
-                    messages
-                }
-            }
-        """
-
-        try:
-            data = self.fetch_graphql(query, {"lotId": lot_id, "bidAmount": bid_amount, "reConfirmed": re_confirmed}, "LotBid")
-
-            if 'bid' in data['data']:
-                return data['data']['bid']
-            elif 'InvalidInputErrors' in data['data']:
-                return data['data']['InvalidInputErrors']
-            else:
-                return None
-        except Exception as e:
-            print(f"Error bidding on lot: {e}")
-            return None
-
-    def get_current_bids(self):
-        query = """
-            query CurrentBidsSearch(
-                $isArchived: Boolean = false, 
-                $groupByAuction: Boolean = true, 
-                $auctionSortDirection: SortDirection = ASC, 
-                $hideClosedLots: Boolean = false, 
-                $pageNumber: Int!, 
-                $pageLength: Int!, 
-                $auctionId: Int = null, 
-                $buyerLotStatusGroup: BuyerLotStatusGroup = null, 
-                $sortOrder: BuyerEventItemSortOrder = null, 
-                $monthRange: AltBidPastBidsRange = null, 
-                $sortDirection: SortDirection = DESC
-            ) {
-                currentBids(
-                    input: {
-                        isArchived: $isArchived, 
-                        groupByAuction: $groupByAuction, 
-                        auctionSortDirection: $auctionSortDirection, 
-                        hideClosedLots: $hideClosedLots, 
-                        auctionId: $auctionId, 
-                        buyerLotStatusGroup: $buyerLotStatusGroup, 
-                        sortOrder: $sortOrder, 
-                        monthRange: $monthRange
-                    }, 
-                    pageNumber: $pageNumber, 
-                    pageLength: $pageLength, 
-                    sortDirection: $sortDirection
-                ) {
-                    auctions {
-                        ...auction
-                        __typename
-                    }
-                    pagedResults {
-                        pageLength
-                        pageNumber
-                        totalCount
-                        filteredCount
-                        results {
-                            ...lotFull
-                            __typename
-                        }
-                        __typename
-                    }
-                    __typename
-                }
-            }
+        # A FetchError with maybe_sent set means the bid may have been
+        # placed; check get_current_bids before bidding again
+        data = self.fetch_graphql(LOT_BID_QUERY, lot_bid_variables(lot_id, bid_amount, re_confirmed), "LotBid")
+        return parse_bid_result(data)
 
-            
-fragment auction on Auction {
-  id
-  altBiddingUrl
-  altBiddingUrlCaption
-  amexAccepted
-  discoverAccepted
-  mastercardAccepted
-  visaAccepted
-  regType
-  holdAmount
-  auctioneer {
-    ...auctioneer
-    __typename
-  }
-  auctionNotice
-  auctionOptions {
-    bidding
-    altBidding
-    catalog
-    liveCatalog
-    shippingType
-    preview
-    registration
-    webcast
-    useLotNumber
-    useSaleOrder
-    __typename
-  }
-  auctionState {
-    auctionStatus
-    bidCardNumber
-    isRegistered
-    openLotCount
-    timeToOpen
-    __typename
-  }
-  bidAmountType
-  biddingNotice
-  bidIncrements {
-    minBidIncrement
-    upToAmount
-    __typename
-  }
-  bidOpenDateTime
-  bidCloseDateTime
-  bidType
-  buyerPremium
-  buyerPremiumRate
-  checkoutDateInfo
-  previewDateInfo
-  currencyAbbreviation
-  description
-  eventAddress
-  eventCity
-  eventDateBegin
-  eventDateEnd
-  eventDateInfo
-  eventName
-  eventState
-  eventZip
-  featuredPicture {
-    description
-    fullSizeLocation
-    height
-    hdThumbnailLocation
-    thumbnailLocation
-    width
-    __typename
-  }
-  links {
-    description
-    id
-    type
-    url
-    videoId
-    __typename
-  }
-  lotCount
-  showBuyerPremium
-  audioVideoChatInfo {
-    aVCEnabled
-    blockChat
-    __typename
-  }
-  shippingAndPickupInfo
-  paymentInfo
-  hidden
-  sourceType
-  distanceMiles
-  __typename
-}
-
-fragment auctioneer on Auctioneer {
-  address
-  bidIncrementDisclaimer
-  buyerRegNotesCaption
-  city
-  countryId
-  country
-  cRMID
-  email
-  fax
-  id
-  internetAddress
-  missingThumbnail
-  name
-  noMinimumCaption
-  phone
-  state
-  postalCode
-  __typename
-}
-
-fragment lotFull on Lot {
-  auction {
-    ...auction
-    __typename
-  }
-  ...lotOnly
-  __typename
-}
-
-fragment lotOnly on Lot {
-  bidAmount
-  bidList
-  bidQuantity
-  description
-  estimate
-  featuredPicture {
-    description
-    fullSizeLocation
-    height
-    hdThumbnailLocation
-    thumbnailLocation
-    width
-    __typename
-  }
-  forceLiveCatalog
-  fr8StarUrl
-  hideLeadWithDescription
-  id
-  itemId
-  lead
-  links {
-    description
-    id
-    type
-    url
-    videoId
-    __typename
-  }
-  linkTypes
-  lotNavigator {
-    lotCount
-    lotPosition
-    nextId
-    previousId
-    __typename
-  }
-  lotNumber
-  lotState {
-    ...lotState
-    __typename
-  }
-  pictureCount
-  pictures {
-    description
-    fullSizeLocation
-    height
-    hdThumbnailLocation
-    thumbnailLocation
-    width
-    __typename
-  }
-  quantity
-  ringNumber
-  rv
-  category {
-    baseCategoryId
-    categoryName
-    description
-    fullCategory
-    header
-    id
-    parentCategoryId
-    uRLPath
-    __typename
-  }
-  shippingOffered
-  simulcastStatus
-  site {
-    domain
-    fr8StarUrl
-    isDomainRequest
-    isExtraWWWRequest
-    siteType
-    subdomain
-    __typename
-  }
-  saleOrder
-  __typename
-}
-
-fragment lotState on LotState {
-  bidCount
-  biddingExtended
-  bidMax
-  bidMaxTotal
-  buyerBidStatus
-  buyerHighBid
-  buyerHighBidTotal
-  buyNow
-  choiceType
-  highBid
-  highBuyerId
-  isArchived
-  isClosed
-  isHidden
-  isLive
-  isNotYetLive
-  isOnLiveCatalog
-  isPosted
-  isPublicHidden
-  isRegistered
-  isWatching
-  linkedSoftClose
-  mayHaveWonStatus
-  minBid
-  priceRealized
-  priceRealizedMessage
-  priceRealizedPerEach
-  productStatus
-  productUrl
-  quantitySold
-  reserveSatisfied
-  sealed
-  showBidStatus
-  showReserveStatus
-  softCloseMinutes
-  softCloseSeconds
-  status
-  timeLeft
-  timeLeftLead
-  timeLeftSeconds
-  timeLeftTitle
-  timeLeftWithLimboSeconds
-  timeLeftWithLimboSeconds
-  watchNotes
-  __typename
-}
-        """
-
-        variables = {
-            "isArchived": False,
-            "groupByAuction": True,
-            "auctionSortDirection": "ASC",
-            "hideClosedLots": False,
-            "auctionId": 0,
-            "buyerLotStatusGroup": "ALL",
-            "sortOrder": "SALES_ORDER",
-            "monthRange": "THREE_MONTHS",
-            "sortDirection": "ASC",
-            "pageNumber": 1,
-            "pageLength": 100
-        }
-
-        try:
-            data = self.fetch_graphql(query, variables, "CurrentBidsSearch")
-
-            if 'currentBids' in data['data']:
-                return data['data']['currentBids']['pagedResults']['results']
-            else:
-                return None
-        except Exception as e:
-            print(f"Error fetching current bids: {e}")
-            return None
-    def search_auction_products(self, auction_id, category =-1, page_number=1, page_length=100, search_text=None):
-        body = {
-        "operationName": "LotSearch",
-        "variables": {
-            "auctionId": auction_id,
-            "category": category,
-            "searchText": search_text,
-            "zip": "",
-            "miles": 50,
-            "shippingOffered": False,
-            "countryName": "",
-            "status": "ALL",
-            "sortOrder": "LOT_NUMBER",
-            "filter": "ALL",
-            "isArchive": False,
-            "countAsView": True,
-            "hideGoogle": False,
-            "pageNumber": page_number,
-            "pageLength": page_length
-        },
-        "query": """query LotSearch($auctionId: Int = null, $pageNumber: Int!, $pageLength: Int!, $category: CategoryId = null, $searchText: String = null, $zip: String = null, $miles: Int = null, $shippingOffered: Boolean = false, $countryName: String = null, $status: AuctionLotStatus = null, $sortOrder: EventItemSortOrder = null, $filter: AuctionLotFilter = null, $isArchive: Boolean = false, $dateStart: DateTime, $dateEnd: DateTime, $countAsView: Boolean = true, $hideGoogle: Boolean = false) {
-  lotSearch(
-    input: {auctionId: $auctionId, category: $category, searchText: $searchText, zip: $zip, miles: $miles, shippingOffered: $shippingOffered, countryName: $countryName, status: $status, sortOrder: $sortOrder, filter: $filter, isArchive: $isArchive, dateStart: $dateStart, dateEnd: $dateEnd, countAsView: $countAsView, hideGoogle: $hideGoogle}
-    pageNumber: $pageNumber
-    pageLength: $pageLength
-    sortDirection: DESC
-  ) {
-    pagedResults {
-      pageLength
-      pageNumber
-      totalCount
-      filteredCount
-      results {
-        auction {
-          ...auctionMinimum
-          __typename
-        }
-        bidAmount
-        bidList
-        bidQuantity
-        description
-        estimate
-        featuredPicture {
-          description
-          fullSizeLocation
-          height
-          hdThumbnailLocation
-          thumbnailLocation
-          width
-          __typename
-        }
-        forceLiveCatalog
-        fr8StarUrl
-        hideLeadWithDescription
-        id
-        itemId
-        lead
-        links {
-          description
-          id
-          type
-          url
-          videoId
-          __typename
-        }
-        linkTypes
-        lotNumber
-        lotState {
-          bidCount
-          biddingExtended
-          bidMax
-          bidMaxTotal
-          buyerBidStatus
-          buyerHighBid
-          buyerHighBidTotal
-          buyNow
-          choiceType
-          highBid
-          highBuyerId
-          isArchived
-          isClosed
-          isHidden
-          isLive
-          isNotYetLive
-          isOnLiveCatalog
-          isPosted
-          isPublicHidden
-          isRegistered
-          isWatching
-          linkedSoftClose
-          mayHaveWonStatus
-          minBid
-          priceRealized
-          priceRealizedMessage
-          priceRealizedPerEach
-          productStatus
-          productUrl
-          quantitySold
-          reserveSatisfied
-          sealed
-          showBidStatus
-          showReserveStatus
-          softCloseMinutes
-          softCloseSeconds
-          status
-          timeLeft
-          timeLeftLead
-          timeLeftSeconds
-          timeLeftTitle
-          timeLeftWithLimboSeconds
-          timeLeftWithLimboSeconds
-          watchNotes
-          __typename
-        }
-        pictureCount
-        quantity
-        ringNumber
-        rv
-        shippingOffered
-        simulcastStatus
-        site {
-          domain
-          fr8StarUrl
-          isDomainRequest
-          isExtraWWWRequest
-          siteType
-          subdomain
-          __typename
-        }
-        distanceMiles
-        __typename
-      }
-      __typename
-    }
-    __typename
-  }
-}
-
-fragment auctionMinimum on Auction {
-  id
-  altBiddingUrl
-  altBiddingUrlCaption
-  amexAccepted
-  discoverAccepted
-  mastercardAccepted
-  visaAccepted
-  regType
-  holdAmount
-  auctioneer {
-    ...auctioneer
-    __typename
-  }
-  auctionOptions {
-    bidding
-    altBidding
-    catalog
-    liveCatalog
-    shippingType
-    preview
-    registration
-    webcast
-    useLotNumber
-    useSaleOrder
-    __typename
-  }
-  auctionState {
-    auctionStatus
-    bidCardNumber
-    isRegistered
-    openLotCount
-    timeToOpen
-    __typename
-  }
-  bidAmountType
-  bidIncrements {
-    minBidIncrement
-    upToAmount
-    __typename
-  }
-  bidOpenDateTime
-  bidCloseDateTime
-  bidType
-  buyerPremium
-  buyerPremiumRate
-  checkoutDateInfo
-  previewDateInfo
-  currencyAbbreviation
-  description
-  eventAddress
-  eventCity
-  eventDateBegin
-  eventDateEnd
-  eventDateInfo
-  eventName
-  eventState
-  eventZip
-  featuredPicture {
-    description
-    fullSizeLocation
-    height
-    hdThumbnailLocation
-    thumbnailLocation
-    width
-    __typename
-  }
-  links {
-    description
-    id
-    type
-    url
-    videoId
-    __typename
-  }
-  lotCount
-  showBuyerPremium
-  audioVideoChatInfo {
-    aVCEnabled
-    blockChat
-    __typename
-  }
-  hidden
-  sourceType
-  distanceMiles
-  __typename
-}
-
-fragment auctioneer on Auctioneer {
-  address
-  bidIncrementDisclaimer
-  buyerRegNotesCaption
-  city
-  countryId
-  country
-  cRMID
-  email
-  fax
-  id
-  internetAddress
-  missingThumbnail
-  name
-  noMinimumCaption
-  phone
-  state
-  postalCode
-  __typename
-}"""
-    }
-        results = self.fetch_graphql(body["query"], body["variables"], "LotSearch")
+    def get_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, fields=None):
+        # every page of current bids; auction_id 0 means all auctions
+        return list(self.iter_current_bids(auction_id, buyer_lot_status_group, hide_closed_lots, fields=fields))
+
+    def search_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, page_number=1,
+                            page_length=100, fields=None):
+        variables = current_bids_variables(auction_id, buyer_lot_status_group, hide_closed_lots, page_number,
+                                           page_length)
+        # fields as for search_auction_products; "bids" is the dashboard set
+        query = CURRENT_BIDS_QUERY if fields is None else build_current_bids_query(fields)
+        data = self.fetch_graphql(query, variables, "CurrentBidsSearch")
+        return data["data"]["currentBids"]
+
+    def iter_current_bids(self, auction_id=0, buyer_lot_status_group="ALL", hide_closed_lots=False, page_length=100,
+                          max_workers=8, fields=None):
+        def fetch(page_number):
+            return self.search_current_bids(auction_id, buyer_lot_status_group, hide_closed_lots, page_number,
+                                            page_length, fields)
+        return self._iter_pages_parallel(fetch, page_length, max_workers)
+
+    def search_auction_products(self, auction_id, category=-1, page_number=1, page_length=100, search_text=None,
+                                fields=None):
+        variables = lot_search_variables(auction_id, category, page_number, page_length, search_text)
+        # fields: dotted lot field paths or a preset name such as "slim";
+        # None keeps the full LOT_SEARCH_QUERY selection
+        query = LOT_SEARCH_QUERY if fields is None else build_lot_search_query(fields)
+        results = self.fetch_graphql(query, variables, "LotSearch")
         return results["data"]["lotSearch"]
 
-    def iter_auction_products(self, auction_id, category=-1, page_length=100):
+    def iter_auction_products(self, auction_id, category=-1, page_length=100, parallel=False, max_workers=8,
+                              fields=None):
+        if parallel:
+            yield from self._iter_auction_products_parallel(auction_id, category, page_length, max_workers, fields)
+            return
+
         page_number = 1
         while True:
-            data = self.search_auction_products(auction_id, category=category, page_number=page_number, page_length=page_length)
+            data = self.search_auction_products(auction_id, category=category, page_number=page_number, page_length=page_length,
+                                                fields=fields)
             results = data['pagedResults']['results']
             
             if not results:
@@ -681,4 +257,51 @@ fragment auctioneer on Auctioneer {
             if filtered_count <= page_number * page_length:
                 break
             
-            page_number += 1
\ No newline at end of file
+            page_number += 1
+
+    def iter_auction_lots(self, auction_id, **kwargs):
+        # iter_auction_products as compact models.Lot objects
+        return parse_lots(self.iter_auction_products(auction_id, **kwargs))
+
+    def _iter_auction_products_parallel(self, auction_id, category, page_length, max_workers, fields):
+        def fetch(page_number):
+            return self.search_auction_products(auction_id, category=category, page_number=page_number,
+                                                page_length=page_length, fields=fields)
+        return self._iter_pages_parallel(fetch, page_length, max_workers)
+
+    def _iter_pages_parallel(self, fetch, page_length, max_workers):
+        # fetch(page_number) returns a result with pagedResults. Page 1
+        # tells us filteredCount; later pages are requested at most
+        # 2 * max_workers ahead of the next page to yield, and finished pages
+        # wait in a reorder buffer until the pages before them have been
+        # yielded, keeping the server's order. A slow page therefore holds
+        # back a bounded number of pages, not the rest of the auction.
+        data = fetch(1)
+        results = data['pagedResults']['results']
+        yield from results
+
+        filtered_count = data['pagedResults']['filteredCount']
+        page_count = -(-filtered_count // page_length)
+        if not results or page_count <= 1:
+            return
+
+        window = 2 * max_workers
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}  # future -> page number
+            buffer = {}
+            next_page = submit_page = 2
+            try:
+                while next_page <= page_count:
+                    while submit_page <= page_count and submit_page < next_page + window:
+                        pending[executor.submit(fetch, submit_page)] = submit_page
+                        submit_page += 1
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # dropped from pending so the page is freed once yielded
+                        buffer[pending.pop(future)] = future.result()['pagedResults']['results']
+                    while next_page in buffer:
+                        yield from buffer.pop(next_page)
+                        next_page += 1
+            finally:
+                for future in pending:
+                    future.cancel()
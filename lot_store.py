@@ -0,0 +1,80 @@
+class LotStore:
+    # Normalized view of LotSearch / CurrentBidsSearch results. Every lot in a
+    # response carries its own copy of the parent auction (and that auction's
+    # auctioneer); the store keeps one record per auction id and auctioneer id
+    # and rewrites lots to point at them by id.
+    def __init__(self):
+        self.auctions = {}
+        self.auctioneers = {}
+        self.lots = {}
+        self.lot_ids_by_auction = {}
+
+    def __len__(self):
+        return len(self.lots)
+
+    def add_auctioneer(self, auctioneer):
+        existing = self.auctioneers.get(auctioneer["id"])
+        if existing is None:
+            self.auctioneers[auctioneer["id"]] = existing = dict(auctioneer)
+        else:
+            existing.update(auctioneer)
+        return existing
+
+    def add_auction(self, auction):
+        auction = dict(auction)
+        auctioneer = auction.pop("auctioneer", None)
+        if auctioneer:
+            auction["auctioneerId"] = self.add_auctioneer(auctioneer)["id"]
+
+        # later copies refresh the record; merging keeps fields that a
+        # projected (e.g. slim) response did not select
+        existing = self.auctions.get(auction["id"])
+        if existing is None:
+            self.auctions[auction["id"]] = existing = auction
+            self.lot_ids_by_auction.setdefault(auction["id"], [])
+        else:
+            existing.update(auction)
+        return existing
+
+    def add_lot(self, lot):
+        lot = dict(lot)
+        auction = lot.pop("auction", None)
+        if auction:
+            lot["auctionId"] = self.add_auction(auction)["id"]
+            if lot["id"] not in self.lots:
+                self.lot_ids_by_auction[lot["auctionId"]].append(lot["id"])
+        self.lots[lot["id"]] = lot
+        return lot
+
+    def add_lots(self, lots):
+        # pass-through generator so a crawl can be normalized while it streams:
+        #   for lot in store.add_lots(api.iter_auction_products(auction_id)): ...
+        for lot in lots:
+            yield self.add_lot(lot)
+
+    def get_lot(self, lot_id):
+        return self.lots.get(lot_id)
+
+    def get_auction(self, auction_id):
+        return self.auctions.get(auction_id)
+
+    def get_auctioneer(self, auctioneer_id):
+        return self.auctioneers.get(auctioneer_id)
+
+    def auction_for_lot(self, lot):
+        return self.auctions.get(lot.get("auctionId"))
+
+    def lots_for_auction(self, auction_id):
+        return [self.lots[lot_id] for lot_id in self.lot_ids_by_auction.get(auction_id, [])]
+
+    def denormalize(self, lot):
+        # rebuild the nested shape the API returned, for code that expects it
+        lot = dict(lot)
+        auction_id = lot.pop("auctionId", None)
+        if auction_id is not None:
+            auction = dict(self.auctions[auction_id])
+            auctioneer_id = auction.pop("auctioneerId", None)
+            if auctioneer_id is not None:
+                auction["auctioneer"] = self.auctioneers[auctioneer_id]
+            lot["auction"] = auction
+        return lot
@@ -0,0 +1,181 @@
+import math
+import re
+import threading
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# "#12" lot / item numbers
+_NUMBER_RE = re.compile(r"#\s*\d+")
+# Words that say nothing about which product a title is
+STOPWORDS = frozenset((
+    "a", "an", "and", "the", "of", "for", "with", "in", "on", "to", "by", "from", "new", "pack", "pcs", "set",
+    "lot", "item", "items", "returned", "return", "customer", "open", "box", "untested", "used",
+))
+# Spellings of the same thing, folded before matching
+SYNONYMS = {
+    "generation": "gen", "quart": "qt", "quarts": "qt", "inch": "in", "inches": "in", "ounce": "oz", "ounces": "oz",
+    "grey": "gray",
+}
+# "8 GB" and "8GB" are one token
+_UNIT_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s+(gb|tb|mb|mah|qt|quarts?|oz|ounces?|in|inch(?:es)?|mm|cm|w|v|mp|hz|k)\b")
+# Words relistings add or drop freely (colours, the store's own name);
+# they count a tenth as much as other tokens
+MINOR_TOKENS = frozenset((
+    "black", "white", "gray", "silver", "gold", "rose", "red", "blue", "navy", "green", "pink", "purple", "beige",
+    "charcoal", "graphite", "sandstone", "heather", "amazon",
+))
+MINOR_WEIGHT = 0.1
+# Model numbers, generations and sizes ("3s", "4th", "10000") tell
+# products apart more than names do
+MODEL_WEIGHT = 2.0
+# Words naming an accessory rather than the product
+ACCESSORY_TOKENS = frozenset((
+    "case", "cover", "mount", "holder", "stand", "bracket", "skin", "sleeve", "protector", "strap", "band",
+    "replacement", "decal", "sticker",
+))
+# Words naming a variant of a model, priced differently from the base one
+VARIANT_TOKENS = frozenset((
+    "pro", "max", "ultra", "plus", "mini", "lite", "oled", "digital", "se", "xl", "slim", "deluxe", "premium",
+    "elite",
+))
+# Storage sizes ("128gb", "1tb"), another way variants differ
+_CAPACITY_RE = re.compile(r"\d+(?:\.\d+)?(?:gb|tb)")
+
+def tokens(title):
+    # distinct normalised tokens of a title, in order
+    seen = {}
+    text = _NUMBER_RE.sub(" ", title.lower())
+    text = _UNIT_RE.sub(lambda m: m.group(1) + SYNONYMS.get(m.group(2), m.group(2)), text)
+    for token in _TOKEN_RE.findall(text):
+        token = SYNONYMS.get(token, token)
+        if token not in STOPWORDS:
+            seen.setdefault(token)
+    return tuple(seen)
+
+
+def qualifiers(title_tokens):
+    # the accessory, variant and capacity tokens of a title; titles match
+    # only when theirs are the same, so "iPhone 13" never takes the price of
+    # an "iPhone 13 Pro Max" nor "Galaxy S21" that of a case for one
+    return frozenset(token for token in title_tokens
+                     if token in ACCESSORY_TOKENS or token in VARIANT_TOKENS or _CAPACITY_RE.fullmatch(token))
+
+
+class ProductIndex:
+    # In-memory TF-IDF index over titles whose products were already
+    # resolved. match() scores a new title against indexed titles by cosine
+    # similarity over IDF-weighted token sets and returns the best one's
+    # value when it reaches threshold, so a relisted product is priced
+    # without another scrape. Rare tokens such as model numbers dominate
+    # the score (tokens with a digit count MODEL_WEIGHT times over), and a
+    # token never seen before (a different model) sinks it. Titles whose
+    # qualifiers() differ (accessory, variant or capacity words) never match.
+    #
+    # Only titles that could reach the threshold are scored: with S the
+    # squared weight a title shares with the query, cosine <= sqrt(S)/|q|,
+    # so a match must share at least threshold**2 of the query's squared
+    # weight and therefore contain one of its rarest tokens (the shortest
+    # prefix, by weight, that the remaining tokens can't make up for).
+    # Candidates come from those tokens' postings only.
+    #
+    # max_entries bounds the index; past it the oldest titles go first.
+    def __init__(self, threshold=0.7, max_entries=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.titles = {}   # entry id -> tokens, oldest first
+        self.values = {}   # entry id -> value
+        self.ids = {}      # tokens -> entry id
+        self.postings = {}  # token -> {entry id, ...}
+        self.hits = 0
+        self.misses = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title, value):
+        key = tokens(title)
+        if not key:
+            return
+        with self._lock:
+            entry = self.ids.get(key)
+            if entry is not None:
+                self.values[entry] = value
+                self.titles[entry] = self.titles.pop(entry)
+                return
+            entry = self.ids[key] = self._next_id
+            self._next_id += 1
+            self.titles[entry] = key
+            self.values[entry] = value
+            for token in key:
+                self.postings.setdefault(token, set()).add(entry)
+            if self.max_entries is not None and len(self.titles) > self.max_entries:
+                self._drop(next(iter(self.titles)))
+
+    def remove(self, title, value):
+        # forgets title if it still maps to value
+        key = tokens(title)
+        with self._lock:
+            entry = self.ids.get(key)
+            if entry is not None and self.values[entry] == value:
+                self._drop(entry)
+
+    def _drop(self, entry):
+        key = self.titles.pop(entry)
+        del self.values[entry], self.ids[key]
+        for token in key:
+            posting = self.postings[token]
+            posting.discard(entry)
+            if not posting:
+                del self.postings[token]
+
+    def match(self, title):
+        # (value, score) of the closest indexed title, or None below threshold
+        query = tokens(title)
+        if not query:
+            return None
+        query_qualifiers = qualifiers(query)
+        with self._lock:
+            count = len(self.titles) + 1
+            weights = {}  # token -> squared idf
+
+            def weight(token):
+                value = weights.get(token)
+                if value is None:
+                    value = (math.log(count / (len(self.postings.get(token, ())) + 1)) + 1) ** 2
+                    if token in MINOR_TOKENS:
+                        value *= MINOR_WEIGHT
+                    elif any(char.isdigit() for char in token):
+                        value *= MODEL_WEIGHT
+                    weights[token] = value
+                return value
+
+            ranked = sorted(query, key=weight, reverse=True)
+            query_weights = dict(weights)
+            query_weight = sum(query_weights.values())
+            needed = self.threshold ** 2 * query_weight
+            remaining = query_weight
+            candidates = set()
+            for token in ranked:
+                if remaining < needed:
+                    break
+                candidates.update(self.postings.get(token, ()))
+                remaining -= weights[token]
+
+            best, best_score = None, 0.0
+            for entry in candidates:
+                title_tokens = self.titles[entry]
+                if qualifiers(title_tokens) != query_qualifiers:
+                    continue
+                shared = sum(weights[token] for token in title_tokens if token in query_weights)
+                score = shared / math.sqrt(query_weight * sum(weight(token) for token in title_tokens))
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self.values[best], best_score
+
+    def stats(self):
+        return {"entries": len(self.titles), "tokens": len(self.postings), "hits": self.hits, "misses": self.misses}
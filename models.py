@@ -0,0 +1,165 @@
+# Compact typed views over HiBid lot payloads. Only the fields we actually
+# read are kept, in __slots__ classes; nested objects (lotState, pictures)
+# are held as plain value tuples and only turned into objects on first
+# access, so a sweep that never looks at pictures never builds them.
+
+
+class Picture:
+    FIELDS = (
+        ("fullSizeLocation", "full_size_location"),
+        ("hdThumbnailLocation", "hd_thumbnail_location"),
+        ("thumbnailLocation", "thumbnail_location"),
+        ("width", "width"),
+        ("height", "height"),
+    )
+    __slots__ = tuple(attr for _, attr in FIELDS)
+
+    def __init__(self, *values):
+        for attr, value in zip(self.__slots__, values):
+            setattr(self, attr, value)
+
+    @classmethod
+    def values_from_dict(cls, data):
+        return tuple(data.get(key) for key, _ in cls.FIELDS)
+
+    def __repr__(self):
+        return f"Picture({self.full_size_location!r})"
+
+
+class LotState:
+    FIELDS = (
+        ("bidCount", "bid_count"),
+        ("highBid", "high_bid"),
+        ("minBid", "min_bid"),
+        ("bidMax", "bid_max"),
+        ("buyNow", "buy_now"),
+        ("buyerBidStatus", "buyer_bid_status"),
+        ("buyerHighBid", "buyer_high_bid"),
+        ("isClosed", "is_closed"),
+        ("isWatching", "is_watching"),
+        ("reserveSatisfied", "reserve_satisfied"),
+        ("softCloseSeconds", "soft_close_seconds"),
+        ("status", "status"),
+        ("timeLeftSeconds", "time_left_seconds"),
+    )
+    __slots__ = tuple(attr for _, attr in FIELDS)
+
+    def __init__(self, *values):
+        for attr, value in zip(self.__slots__, values):
+            setattr(self, attr, value)
+
+    @classmethod
+    def values_from_dict(cls, data):
+        return tuple(data.get(key) for key, _ in cls.FIELDS)
+
+    def __repr__(self):
+        return f"LotState(high_bid={self.high_bid!r}, bid_count={self.bid_count!r}, " \
+               f"time_left_seconds={self.time_left_seconds!r})"
+
+
+class Auction:
+    __slots__ = ("id", "event_name", "currency", "bid_close_date_time", "buyer_premium", "buyer_premium_rate",
+                 "show_buyer_premium", "bid_increments", "auctioneer_id", "auctioneer_name")
+
+    def __init__(self, id, event_name=None, currency=None, bid_close_date_time=None, buyer_premium=None,
+                 buyer_premium_rate=None, show_buyer_premium=None, bid_increments=(), auctioneer_id=None,
+                 auctioneer_name=None):
+        self.id = id
+        self.event_name = event_name
+        self.currency = currency
+        self.bid_close_date_time = bid_close_date_time
+        self.buyer_premium = buyer_premium
+        self.buyer_premium_rate = buyer_premium_rate
+        self.show_buyer_premium = show_buyer_premium
+        # ((upToAmount, minBidIncrement), ...) sorted by upToAmount
+        self.bid_increments = bid_increments
+        self.auctioneer_id = auctioneer_id
+        self.auctioneer_name = auctioneer_name
+
+    @classmethod
+    def from_dict(cls, data):
+        auctioneer = data.get("auctioneer") or {}
+        increments = tuple(sorted((row["upToAmount"], row["minBidIncrement"])
+                                  for row in data.get("bidIncrements") or ()))
+        return cls(
+            data["id"],
+            event_name=data.get("eventName"),
+            currency=data.get("currencyAbbreviation"),
+            bid_close_date_time=data.get("bidCloseDateTime"),
+            buyer_premium=data.get("buyerPremium"),
+            buyer_premium_rate=data.get("buyerPremiumRate"),
+            show_buyer_premium=data.get("showBuyerPremium"),
+            bid_increments=increments,
+            auctioneer_id=auctioneer.get("id"),
+            auctioneer_name=auctioneer.get("name"),
+        )
+
+    def __repr__(self):
+        return f"Auction(id={self.id!r}, event_name={self.event_name!r})"
+
+
+class Lot:
+    __slots__ = ("id", "lot_number", "lead", "description", "quantity", "shipping_offered", "auction",
+                 "_lot_state", "_featured_picture", "_pictures")
+
+    @classmethod
+    def from_dict(cls, data, auctions=None):
+        # auctions: optional {auction id: Auction} shared across calls so all
+        # lots of one auction point at a single Auction instance
+        lot = cls.__new__(cls)
+        lot.id = data["id"]
+        lot.lot_number = data.get("lotNumber")
+        lot.lead = data.get("lead")
+        lot.description = data.get("description")
+        lot.quantity = data.get("quantity")
+        lot.shipping_offered = data.get("shippingOffered")
+
+        auction = data.get("auction")
+        if auction is None:
+            lot.auction = None
+        elif auctions is None:
+            lot.auction = Auction.from_dict(auction)
+        else:
+            lot.auction = auctions.get(auction["id"])
+            if lot.auction is None:
+                lot.auction = auctions[auction["id"]] = Auction.from_dict(auction)
+
+        state = data.get("lotState")
+        lot._lot_state = LotState.values_from_dict(state) if state else None
+        picture = data.get("featuredPicture")
+        lot._featured_picture = Picture.values_from_dict(picture) if picture else None
+        pictures = data.get("pictures")
+        lot._pictures = tuple(Picture.values_from_dict(p) for p in pictures) if pictures else ()
+        return lot
+
+    @property
+    def auction_id(self):
+        return self.auction.id if self.auction is not None else None
+
+    @property
+    def lot_state(self):
+        if isinstance(self._lot_state, tuple):
+            self._lot_state = LotState(*self._lot_state)
+        return self._lot_state
+
+    @property
+    def featured_picture(self):
+        if isinstance(self._featured_picture, tuple):
+            self._featured_picture = Picture(*self._featured_picture)
+        return self._featured_picture
+
+    @property
+    def pictures(self):
+        if self._pictures and isinstance(self._pictures[0], tuple):
+            self._pictures = tuple(Picture(*values) for values in self._pictures)
+        return self._pictures
+
+    def __repr__(self):
+        return f"Lot(id={self.id!r}, lot_number={self.lot_number!r}, lead={self.lead!r})"
+
+
+def parse_lots(results, auctions=None):
+    if auctions is None:
+        auctions = {}
+    for data in results:
+        yield Lot.from_dict(data, auctions)
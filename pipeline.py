@@ -0,0 +1,131 @@
+import heapq
+import itertools
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from analyze import get_amazon_price_and_url
+from costs import COST_LOT_FIELDS, CostEngine
+
+# What the pipeline needs of each lot
+PIPELINE_LOT_FIELDS = COST_LOT_FIELDS + (
+    "lotNumber",
+    "lead",
+    "description",
+    "lotState.isClosed",
+)
+
+# Listing noise that hurts an Amazon search: lot/item numbers, bracketed
+# notes, quantities and condition boilerplate
+_NOISE_RE = re.compile(
+    r"#\s*\d+|\blot\s*\d+\b|\(\s*(?:qty|quantity|x)?\s*\d+\s*\)|\bqty\.?\s*\d+\b|"
+    r"\b(?:returned|open box|untested|as is|customer return|damaged box)\b",
+    re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r"[^\w()&+.'-]+")
+
+
+def product_query(lot, max_words=8):
+    # Amazon search text for a lot: its lead (falling back to the first
+    # sentence of the description) without listing noise
+    text = lot.get("lead") or (lot.get("description") or "").split(".")[0]
+    words = [word for word in _SEPARATOR_RE.sub(" ", _NOISE_RE.sub(" ", text)).split() if any(map(str.isalnum, word))]
+    return " ".join(words[:max_words])
+
+
+class OpportunityPipeline:
+    # Streams lots from one or more auctions, resolves Amazon prices on a
+    # bounded pool while further pages are still arriving, scores each lot
+    # against its landed cost (costs.CostEngine: current bid plus buyer
+    # premium and fees) and keeps the best k in a min-heap. top() can be
+    # read from any thread while the pipeline runs. At most
+    # max_workers * 4 lookups are queued, so a slow lookup applies back
+    # pressure to paging instead of buffering the whole auction.
+    def __init__(self, api, k=20, min_profit=20, max_workers=8, lookup=get_amazon_price_and_url,
+                 on_opportunity=None, costs=None):
+        self.api = api
+        self.costs = costs or CostEngine()
+        self.k = k
+        self.min_profit = min_profit
+        self.max_workers = max_workers
+        self.lookup = lookup
+        self.on_opportunity = on_opportunity
+        self.scored = 0
+        self.failed = 0
+        self._heap = []  # (profit margin %, seq, opportunity)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def score(self, lot, query, am):
+        # the opportunity dict for a priced lot, or None
+        if am is None or "price" not in am:
+            return None
+        cost = self.costs.cost(lot)
+        if cost <= 0:
+            return None
+        amazon_price = am["price"]
+        profit_margin = (amazon_price - cost) / cost * 100
+        if profit_margin < self.min_profit:
+            return None
+        return {
+            "lotId": lot["id"],
+            "auctionId": (lot.get("auction") or {}).get("id"),
+            "lotNumber": lot.get("lotNumber"),
+            "query": query,
+            "cost": cost,
+            "amazonPrice": amazon_price,
+            "profit": amazon_price - cost,
+            "profitMargin": profit_margin,
+            "product": am.get("product"),
+        }
+
+    def _offer(self, opportunity):
+        with self._lock:
+            entry = (opportunity["profitMargin"], next(self._seq), opportunity)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+            else:
+                return
+        if self.on_opportunity is not None:
+            self.on_opportunity(opportunity)
+
+    def _evaluate(self, lot, query, slots):
+        try:
+            try:
+                am = self.lookup(query)
+            except Exception as e:
+                print(f"Amazon lookup failed for {query}: {e}")
+                with self._lock:
+                    self.failed += 1
+                return
+            opportunity = self.score(lot, query, am)
+            with self._lock:
+                self.scored += 1
+            if opportunity is not None:
+                self._offer(opportunity)
+        finally:
+            slots.release()
+
+    def top(self):
+        # current best opportunities, best first
+        with self._lock:
+            return [opportunity for _, _, opportunity in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def run(self, auction_ids, **iter_kwargs):
+        # iter_kwargs go to api.iter_auction_products (parallel paging is on
+        # by default); returns top() once every lot has been scored
+        iter_kwargs.setdefault("parallel", True)
+        iter_kwargs.setdefault("fields", PIPELINE_LOT_FIELDS)
+        slots = threading.BoundedSemaphore(self.max_workers * 4)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for auction_id in auction_ids:
+                for lot in self.api.iter_auction_products(auction_id, **iter_kwargs):
+                    if (lot.get("lotState") or {}).get("isClosed"):
+                        continue
+                    query = product_query(lot)
+                    if not query:
+                        continue
+                    slots.acquire()
+                    executor.submit(self._evaluate, lot, query, slots)
+        return self.top()
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class PriceCache:
+    # Amazon price cache: a bounded LRU in memory with a per-entry TTL, and
+    # optionally a SQLite file underneath so entries survive restarts and
+    # are shared by every worker process pointing at the same path.
+    # The file is bounded too: expired rows and, past max_entries, the
+    # rows closest to expiry are purged when it is opened and every
+    # purge_interval seconds on set().
+    # on_evict(key) is called when an entry is gone for good: expired,
+    # deleted, or dropped from memory or the file with no copy left in the
+    # other.
+    def __init__(self, max_entries=5000, ttl=7 * 24 * 3600, path=None, clock=time.time, on_evict=None,
+                 purge_interval=3600.0):
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.purge_interval = purge_interval
+        self.ttl = ttl
+        self.path = path
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)")
+            self.conn.commit()
+            # nothing can have been handed out yet, so nobody to notify
+            with self._lock:
+                self._purge(self.clock(), notify=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def _remember(self, key, expires_at, value):
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            if self.conn is None:
+                self._evicted(evicted)
+
+    def _evicted(self, key):
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def _load(self, key, now):
+        row = self.conn.execute("SELECT expires_at, value FROM prices WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return row[0], json.loads(row[1])
+
+    def get(self, key, count=True):
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                self.expirations += 1
+                self._evicted(key)
+                entry = None
+            if entry is None and self.conn is not None:
+                # another process may have filled it since
+                entry = self._load(key, now)
+                if entry is not None:
+                    self._remember(key, *entry)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        now = self.clock()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO prices (key, expires_at, value) VALUES (?, ?, ?)",
+                                      (key, expires_at, json.dumps(value)))
+                if now >= self._next_purge:
+                    self._purge(now)
+
+    def delete(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+            self._evicted(key)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("DELETE FROM prices WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge(self.clock())
+
+    def _purge(self, now, notify=True):
+        # drops expired entries, then trims the file to max_entries rows,
+        # those closest to expiry first; called with the lock held
+        expired = {key for key, (expires_at, _) in self.entries.items() if expires_at <= now}
+        for key in expired:
+            del self.entries[key]
+            self.expirations += 1
+        if self.conn is not None:
+            with self.conn:
+                expired.update(key for key, in self.conn.execute("SELECT key FROM prices WHERE expires_at <= ?",
+                                                                 (now,)))
+                self.conn.execute("DELETE FROM prices WHERE expires_at <= ?", (now,))
+                excess = self.conn.execute("SELECT count(*) FROM prices").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    trimmed = [key for key, in self.conn.execute(
+                        "SELECT key FROM prices ORDER BY expires_at LIMIT ?", (excess,))]
+                    self.conn.executemany("DELETE FROM prices WHERE key = ?", ((key,) for key in trimmed))
+                    self.evictions += len(trimmed)
+                    expired.update(key for key in trimmed if key not in self.entries)
+            self._next_purge = now + self.purge_interval
+        if notify:
+            for key in expired:
+                self._evicted(key)
+
+    def keys(self):
+        # every unexpired key, on disk ones included, without decoding values
+        now = self.clock()
+        with self._lock:
+            keys = {key: None for key, (expires_at, _) in self.entries.items() if expires_at > now}
+            if self.conn is not None:
+                keys.update((key, None) for key, in self.conn.execute("SELECT key FROM prices WHERE expires_at > ?",
+                                                                      (now,)))
+        return list(keys)
+
+    def items(self):
+        # every unexpired (key, value), on disk ones included
+        now = self.clock()
+        with self._lock:
+            items = {key: value for key, (expires_at, value) in self.entries.items() if expires_at > now}
+            if self.conn is not None:
+                for key, value in self.conn.execute("SELECT key, value FROM prices WHERE expires_at > ?", (now,)):
+                    items.setdefault(key, json.loads(value))
+        return list(items.items())
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
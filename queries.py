@@ -0,0 +1,717 @@
+# GraphQL documents shared by ApiWrapper and AsyncApiWrapper.
+
+LOT_BID_QUERY = """
+            mutation LotBid($lotId: Int!, $bidAmount: Decimal!, $reConfirmed: Boolean!) {
+                bid(input: { lotId: $lotId, bidAmount: $bidAmount, reConfirmed: $reConfirmed }) {
+                    __typename
+                    ... on BidResultType {
+                        bidStatus
+                        suggestedBid
+                        bidMessage
+                        lot {
+                            ...lotFull
+                            __typename
+                        }
+                        __typename
+                    }
+                    ...InvalidInputErrors
+                }
+            }
+
+            fragment lotFull on Lot {
+                id
+                description
+            }
+
+            fragment InvalidInputErrors on InvalidInputError {
+                messages
+                errors {
+                    fieldName
+                    messages
+                }
+            }
+        """
+
+CURRENT_BIDS_QUERY = """
+            query CurrentBidsSearch(
+                $isArchived: Boolean = false, 
+                $groupByAuction: Boolean = true, 
+                $auctionSortDirection: SortDirection = ASC, 
+                $hideClosedLots: Boolean = false, 
+                $pageNumber: Int!, 
+                $pageLength: Int!, 
+                $auctionId: Int = null, 
+                $buyerLotStatusGroup: BuyerLotStatusGroup = null, 
+                $sortOrder: BuyerEventItemSortOrder = null, 
+                $monthRange: AltBidPastBidsRange = null, 
+                $sortDirection: SortDirection = DESC
+            ) {
+                currentBids(
+                    input: {
+                        isArchived: $isArchived, 
+                        groupByAuction: $groupByAuction, 
+                        auctionSortDirection: $auctionSortDirection, 
+                        hideClosedLots: $hideClosedLots, 
+                        auctionId: $auctionId, 
+                        buyerLotStatusGroup: $buyerLotStatusGroup, 
+                        sortOrder: $sortOrder, 
+                        monthRange: $monthRange
+                    }, 
+                    pageNumber: $pageNumber, 
+                    pageLength: $pageLength, 
+                    sortDirection: $sortDirection
+                ) {
+                    auctions {
+                        ...auction
+                        __typename
+                    }
+                    pagedResults {
+                        pageLength
+                        pageNumber
+                        totalCount
+                        filteredCount
+                        results {
+                            ...lotFull
+                            __typename
+                        }
+                        __typename
+                    }
+                    __typename
+                }
+            }
+
+            
+fragment auction on Auction {
+  id
+  altBiddingUrl
+  altBiddingUrlCaption
+  amexAccepted
+  discoverAccepted
+  mastercardAccepted
+  visaAccepted
+  regType
+  holdAmount
+  auctioneer {
+    ...auctioneer
+    __typename
+  }
+  auctionNotice
+  auctionOptions {
+    bidding
+    altBidding
+    catalog
+    liveCatalog
+    shippingType
+    preview
+    registration
+    webcast
+    useLotNumber
+    useSaleOrder
+    __typename
+  }
+  auctionState {
+    auctionStatus
+    bidCardNumber
+    isRegistered
+    openLotCount
+    timeToOpen
+    __typename
+  }
+  bidAmountType
+  biddingNotice
+  bidIncrements {
+    minBidIncrement
+    upToAmount
+    __typename
+  }
+  bidOpenDateTime
+  bidCloseDateTime
+  bidType
+  buyerPremium
+  buyerPremiumRate
+  checkoutDateInfo
+  previewDateInfo
+  currencyAbbreviation
+  description
+  eventAddress
+  eventCity
+  eventDateBegin
+  eventDateEnd
+  eventDateInfo
+  eventName
+  eventState
+  eventZip
+  featuredPicture {
+    description
+    fullSizeLocation
+    height
+    hdThumbnailLocation
+    thumbnailLocation
+    width
+    __typename
+  }
+  links {
+    description
+    id
+    type
+    url
+    videoId
+    __typename
+  }
+  lotCount
+  showBuyerPremium
+  audioVideoChatInfo {
+    aVCEnabled
+    blockChat
+    __typename
+  }
+  shippingAndPickupInfo
+  paymentInfo
+  hidden
+  sourceType
+  distanceMiles
+  __typename
+}
+
+fragment auctioneer on Auctioneer {
+  address
+  bidIncrementDisclaimer
+  buyerRegNotesCaption
+  city
+  countryId
+  country
+  cRMID
+  email
+  fax
+  id
+  internetAddress
+  missingThumbnail
+  name
+  noMinimumCaption
+  phone
+  state
+  postalCode
+  __typename
+}
+
+fragment lotFull on Lot {
+  auction {
+    ...auction
+    __typename
+  }
+  ...lotOnly
+  __typename
+}
+
+fragment lotOnly on Lot {
+  bidAmount
+  bidList
+  bidQuantity
+  description
+  estimate
+  featuredPicture {
+    description
+    fullSizeLocation
+    height
+    hdThumbnailLocation
+    thumbnailLocation
+    width
+    __typename
+  }
+  forceLiveCatalog
+  fr8StarUrl
+  hideLeadWithDescription
+  id
+  itemId
+  lead
+  links {
+    description
+    id
+    type
+    url
+    videoId
+    __typename
+  }
+  linkTypes
+  lotNavigator {
+    lotCount
+    lotPosition
+    nextId
+    previousId
+    __typename
+  }
+  lotNumber
+  lotState {
+    ...lotState
+    __typename
+  }
+  pictureCount
+  pictures {
+    description
+    fullSizeLocation
+    height
+    hdThumbnailLocation
+    thumbnailLocation
+    width
+    __typename
+  }
+  quantity
+  ringNumber
+  rv
+  category {
+    baseCategoryId
+    categoryName
+    description
+    fullCategory
+    header
+    id
+    parentCategoryId
+    uRLPath
+    __typename
+  }
+  shippingOffered
+  simulcastStatus
+  site {
+    domain
+    fr8StarUrl
+    isDomainRequest
+    isExtraWWWRequest
+    siteType
+    subdomain
+    __typename
+  }
+  saleOrder
+  __typename
+}
+
+fragment lotState on LotState {
+  bidCount
+  biddingExtended
+  bidMax
+  bidMaxTotal
+  buyerBidStatus
+  buyerHighBid
+  buyerHighBidTotal
+  buyNow
+  choiceType
+  highBid
+  highBuyerId
+  isArchived
+  isClosed
+  isHidden
+  isLive
+  isNotYetLive
+  isOnLiveCatalog
+  isPosted
+  isPublicHidden
+  isRegistered
+  isWatching
+  linkedSoftClose
+  mayHaveWonStatus
+  minBid
+  priceRealized
+  priceRealizedMessage
+  priceRealizedPerEach
+  productStatus
+  productUrl
+  quantitySold
+  reserveSatisfied
+  sealed
+  showBidStatus
+  showReserveStatus
+  softCloseMinutes
+  softCloseSeconds
+  status
+  timeLeft
+  timeLeftLead
+  timeLeftSeconds
+  timeLeftTitle
+  timeLeftWithLimboSeconds
+  timeLeftWithLimboSeconds
+  watchNotes
+  __typename
+}
+        """
+
+LOT_SEARCH_QUERY = """query LotSearch($auctionId: Int = null, $pageNumber: Int!, $pageLength: Int!, $category: CategoryId = null, $searchText: String = null, $zip: String = null, $miles: Int = null, $shippingOffered: Boolean = false, $countryName: String = null, $status: AuctionLotStatus = null, $sortOrder: EventItemSortOrder = null, $filter: AuctionLotFilter = null, $isArchive: Boolean = false, $dateStart: DateTime, $dateEnd: DateTime, $countAsView: Boolean = true, $hideGoogle: Boolean = false) {
+  lotSearch(
+    input: {auctionId: $auctionId, category: $category, searchText: $searchText, zip: $zip, miles: $miles, shippingOffered: $shippingOffered, countryName: $countryName, status: $status, sortOrder: $sortOrder, filter: $filter, isArchive: $isArchive, dateStart: $dateStart, dateEnd: $dateEnd, countAsView: $countAsView, hideGoogle: $hideGoogle}
+    pageNumber: $pageNumber
+    pageLength: $pageLength
+    sortDirection: DESC
+  ) {
+    pagedResults {
+      pageLength
+      pageNumber
+      totalCount
+      filteredCount
+      results {
+        auction {
+          ...auctionMinimum
+          __typename
+        }
+        bidAmount
+        bidList
+        bidQuantity
+        description
+        estimate
+        featuredPicture {
+          description
+          fullSizeLocation
+          height
+          hdThumbnailLocation
+          thumbnailLocation
+          width
+          __typename
+        }
+        forceLiveCatalog
+        fr8StarUrl
+        hideLeadWithDescription
+        id
+        itemId
+        lead
+        links {
+          description
+          id
+          type
+          url
+          videoId
+          __typename
+        }
+        linkTypes
+        lotNumber
+        lotState {
+          bidCount
+          biddingExtended
+          bidMax
+          bidMaxTotal
+          buyerBidStatus
+          buyerHighBid
+          buyerHighBidTotal
+          buyNow
+          choiceType
+          highBid
+          highBuyerId
+          isArchived
+          isClosed
+          isHidden
+          isLive
+          isNotYetLive
+          isOnLiveCatalog
+          isPosted
+          isPublicHidden
+          isRegistered
+          isWatching
+          linkedSoftClose
+          mayHaveWonStatus
+          minBid
+          priceRealized
+          priceRealizedMessage
+          priceRealizedPerEach
+          productStatus
+          productUrl
+          quantitySold
+          reserveSatisfied
+          sealed
+          showBidStatus
+          showReserveStatus
+          softCloseMinutes
+          softCloseSeconds
+          status
+          timeLeft
+          timeLeftLead
+          timeLeftSeconds
+          timeLeftTitle
+          timeLeftWithLimboSeconds
+          timeLeftWithLimboSeconds
+          watchNotes
+          __typename
+        }
+        pictureCount
+        quantity
+        ringNumber
+        rv
+        shippingOffered
+        simulcastStatus
+        site {
+          domain
+          fr8StarUrl
+          isDomainRequest
+          isExtraWWWRequest
+          siteType
+          subdomain
+          __typename
+        }
+        distanceMiles
+        __typename
+      }
+      __typename
+    }
+    __typename
+  }
+}
+
+fragment auctionMinimum on Auction {
+  id
+  altBiddingUrl
+  altBiddingUrlCaption
+  amexAccepted
+  discoverAccepted
+  mastercardAccepted
+  visaAccepted
+  regType
+  holdAmount
+  auctioneer {
+    ...auctioneer
+    __typename
+  }
+  auctionOptions {
+    bidding
+    altBidding
+    catalog
+    liveCatalog
+    shippingType
+    preview
+    registration
+    webcast
+    useLotNumber
+    useSaleOrder
+    __typename
+  }
+  auctionState {
+    auctionStatus
+    bidCardNumber
+    isRegistered
+    openLotCount
+    timeToOpen
+    __typename
+  }
+  bidAmountType
+  bidIncrements {
+    minBidIncrement
+    upToAmount
+    __typename
+  }
+  bidOpenDateTime
+  bidCloseDateTime
+  bidType
+  buyerPremium
+  buyerPremiumRate
+  checkoutDateInfo
+  previewDateInfo
+  currencyAbbreviation
+  description
+  eventAddress
+  eventCity
+  eventDateBegin
+  eventDateEnd
+  eventDateInfo
+  eventName
+  eventState
+  eventZip
+  featuredPicture {
+    description
+    fullSizeLocation
+    height
+    hdThumbnailLocation
+    thumbnailLocation
+    width
+    __typename
+  }
+  links {
+    description
+    id
+    type
+    url
+    videoId
+    __typename
+  }
+  lotCount
+  showBuyerPremium
+  audioVideoChatInfo {
+    aVCEnabled
+    blockChat
+    __typename
+  }
+  hidden
+  sourceType
+  distanceMiles
+  __typename
+}
+
+fragment auctioneer on Auctioneer {
+  address
+  bidIncrementDisclaimer
+  buyerRegNotesCaption
+  city
+  countryId
+  country
+  cRMID
+  email
+  fax
+  id
+  internetAddress
+  missingThumbnail
+  name
+  noMinimumCaption
+  phone
+  state
+  postalCode
+  __typename
+}"""
+
+
+# Field projection for LotSearch. Callers list the lot fields they need as
+# dotted paths ("lotState.highBid") and build_lot_search_query renders a
+# query selecting only those, instead of the full LOT_SEARCH_QUERY.
+
+SLIM_LOT_FIELDS = (
+    "id",
+    "lotNumber",
+    "lead",
+    "description",
+    "auction.id",
+    "lotState.bidCount",
+    "lotState.highBid",
+    "lotState.minBid",
+    "lotState.isClosed",
+    "lotState.timeLeftSeconds",
+)
+
+# What a current-bids dashboard needs each poll
+CURRENT_BID_FIELDS = (
+    "id",
+    "lotNumber",
+    "lead",
+    "auction.id",
+    "lotState.bidCount",
+    "lotState.highBid",
+    "lotState.minBid",
+    "lotState.buyerHighBid",
+    "lotState.buyerBidStatus",
+    "lotState.isClosed",
+    "lotState.timeLeftSeconds",
+)
+
+LOT_FIELD_PRESETS = {
+    "slim": SLIM_LOT_FIELDS,
+    "bids": CURRENT_BID_FIELDS,
+}
+
+_LOT_SEARCH_PROJECTION_TEMPLATE = """query LotSearch($auctionId: Int = null, $pageNumber: Int!, $pageLength: Int!, $category: CategoryId = null, $searchText: String = null, $zip: String = null, $miles: Int = null, $shippingOffered: Boolean = false, $countryName: String = null, $status: AuctionLotStatus = null, $sortOrder: EventItemSortOrder = null, $filter: AuctionLotFilter = null, $isArchive: Boolean = false, $dateStart: DateTime, $dateEnd: DateTime, $countAsView: Boolean = true, $hideGoogle: Boolean = false) {
+  lotSearch(
+    input: {auctionId: $auctionId, category: $category, searchText: $searchText, zip: $zip, miles: $miles, shippingOffered: $shippingOffered, countryName: $countryName, status: $status, sortOrder: $sortOrder, filter: $filter, isArchive: $isArchive, dateStart: $dateStart, dateEnd: $dateEnd, countAsView: $countAsView, hideGoogle: $hideGoogle}
+    pageNumber: $pageNumber
+    pageLength: $pageLength
+    sortDirection: DESC
+  ) {
+    pagedResults {
+      pageLength
+      pageNumber
+      totalCount
+      filteredCount
+      results {
+%s
+      }
+    }
+  }
+}"""
+
+_CURRENT_BIDS_PROJECTION_TEMPLATE = """query CurrentBidsSearch($isArchived: Boolean = false, $groupByAuction: Boolean = true, $auctionSortDirection: SortDirection = ASC, $hideClosedLots: Boolean = false, $pageNumber: Int!, $pageLength: Int!, $auctionId: Int = null, $buyerLotStatusGroup: BuyerLotStatusGroup = null, $sortOrder: BuyerEventItemSortOrder = null, $monthRange: AltBidPastBidsRange = null, $sortDirection: SortDirection = DESC) {
+  currentBids(
+    input: {isArchived: $isArchived, groupByAuction: $groupByAuction, auctionSortDirection: $auctionSortDirection, hideClosedLots: $hideClosedLots, auctionId: $auctionId, buyerLotStatusGroup: $buyerLotStatusGroup, sortOrder: $sortOrder, monthRange: $monthRange}
+    pageNumber: $pageNumber
+    pageLength: $pageLength
+    sortDirection: $sortDirection
+  ) {
+    pagedResults {
+      pageLength
+      pageNumber
+      totalCount
+      filteredCount
+      results {
+%s
+      }
+    }
+  }
+}"""
+
+# Lot paths that are objects in the schema; a projection must name their
+# subfields, since GraphQL rejects an object field without a selection
+OBJECT_FIELDS = frozenset((
+    "auction",
+    "auction.auctioneer",
+    "auction.auctionOptions",
+    "auction.auctionState",
+    "auction.audioVideoChatInfo",
+    "auction.bidIncrements",
+    "auction.featuredPicture",
+    "auction.links",
+    "category",
+    "featuredPicture",
+    "links",
+    "lotNavigator",
+    "lotState",
+    "pictures",
+    "site",
+))
+
+_projection_cache = {}
+
+
+def resolve_fields(fields):
+    if isinstance(fields, str):
+        try:
+            return LOT_FIELD_PRESETS[fields]
+        except KeyError:
+            raise ValueError(f"Unknown field preset: {fields}")
+    return tuple(fields)
+
+
+def check_fields(fields):
+    for path in fields:
+        if path in OBJECT_FIELDS:
+            raise ValueError(f"Field {path} is an object; list its subfields instead ({path}.<field>)")
+
+
+def build_selection(fields, indent=8):
+    # {"id": {}, "lotState": {"highBid": {}}} from ["id", "lotState.highBid"]
+    check_fields(fields)
+    tree = {"id": {}}
+    for path in fields:
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return _render_selection(tree, indent)
+
+
+def _render_selection(tree, indent):
+    pad = " " * indent
+    lines = []
+    for name, children in tree.items():
+        if children:
+            lines.append(f"{pad}{name} {{")
+            lines.append(_render_selection(children, indent + 2))
+            lines.append(f"{pad}}}")
+        else:
+            lines.append(f"{pad}{name}")
+    return "\n".join(lines)
+
+
+def _build_projection(template, fields):
+    fields = resolve_fields(fields)
+    query = _projection_cache.get((template, fields))
+    if query is None:
+        query = template % build_selection(fields)
+        _projection_cache[(template, fields)] = query
+    return query
+
+
+def build_lot_search_query(fields):
+    return _build_projection(_LOT_SEARCH_PROJECTION_TEMPLATE, fields)
+
+
+def build_current_bids_query(fields):
+    # CurrentBidsSearch selecting only `fields` of each lot (no auctions
+    # block); same field paths and presets as build_lot_search_query
+    return _build_projection(_CURRENT_BIDS_PROJECTION_TEMPLATE, fields)
@@ -0,0 +1,167 @@
+import os
+import re
+import struct
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    # Thread-safe token bucket: `rate` tokens per second, bursts up to
+    # `capacity`. acquire() blocks until a token is available.
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens, updated, now):
+        if updated > now:
+            # state from another boot's monotonic clock
+            return self.capacity
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _reserve(self, tokens):
+        # takes the tokens now (possibly going negative) and returns how
+        # long the caller has to wait before using them
+        with self._lock:
+            now = self.clock()
+            self.tokens = self._refill(self.tokens, self.updated, now) - tokens
+            self.updated = now
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0):
+        with self._lock:
+            now = self.clock()
+            self.tokens = self._refill(self.tokens, self.updated, now)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+class FileTokenBucket(TokenBucket):
+    # TokenBucket whose state (tokens, last update) lives in a small file
+    # guarded by an flock, so every process using the same path draws from
+    # one budget. The monotonic clock is system-wide on Linux, so
+    # timestamps agree between processes.
+    _STATE = struct.Struct("dd")
+
+    def __init__(self, path, rate: float, capacity: float = None, clock=time.monotonic):
+        import fcntl  # POSIX only
+
+        super().__init__(rate, capacity, clock)
+        self._fcntl = fcntl
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _locked_update(self, update):
+        # update(tokens, now) -> (new tokens, result); flock serialises
+        # processes, the thread lock threads sharing this descriptor
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                now = self.clock()
+                state = os.pread(self._fd, self._STATE.size, 0)
+                if len(state) == self._STATE.size:
+                    tokens = self._refill(*self._STATE.unpack(state), now)
+                else:
+                    tokens = self.capacity
+                tokens, result = update(tokens)
+                os.pwrite(self._fd, self._STATE.pack(tokens, now), 0)
+                self.tokens, self.updated = tokens, now
+                return result
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def _reserve(self, tokens):
+        def update(available):
+            available -= tokens
+            return available, 0.0 if available >= 0 else -available / self.rate
+        return self._locked_update(update)
+
+    def try_acquire(self, tokens: float = 1.0):
+        def update(available):
+            if available >= tokens:
+                return available - tokens, True
+            return available, False
+        return self._locked_update(update)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class HostRateLimiter:
+    # One TokenBucket per host, plus optional buckets per GraphQL operation
+    # that apply on top of their host's. `overrides` maps host ->
+    # (rate, capacity) for hosts that need a different budget than the
+    # default; `operations` maps operation name -> (rate, capacity).
+    # With `path` (a directory) buckets are FileTokenBuckets there, shared
+    # with every process configured with the same directory.
+    def __init__(self, rate: float, capacity: float = None, overrides: dict = None, operations: dict = None,
+                 path: str = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.overrides = overrides or {}
+        self.operations = operations or {}
+        self.path = path
+        self.buckets = {}
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _make_bucket(self, key, rate, capacity):
+        if not self.path:
+            return TokenBucket(rate, capacity)
+        name = re.sub(r"[^A-Za-z0-9.-]+", "_", "-".join(part for part in key if part))
+        return FileTokenBucket(os.path.join(self.path, f"{name}.bucket"), rate, capacity)
+
+    def bucket(self, host, operation=None):
+        # the host's bucket, or with operation the operation's bucket on
+        # that host (None when the operation has no limit of its own)
+        if operation is not None and operation not in self.operations:
+            return None
+        key = (host, operation)
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if operation is None:
+                    rate, capacity = self.overrides.get(host, (self.rate, self.capacity))
+                else:
+                    rate, capacity = self.operations[operation]
+                bucket = self.buckets[key] = self._make_bucket(key, rate, capacity)
+            return bucket
+
+    def reserve(self, url: str, operation: str = None):
+        # takes a token from every bucket that applies and returns how long
+        # to wait before sending; for callers that sleep themselves
+        host = urlparse(url).hostname
+        wait = self.bucket(host)._reserve(1.0)
+        bucket = self.bucket(host, operation) if operation else None
+        if bucket is not None:
+            wait = max(wait, bucket._reserve(1.0))
+        return wait
+
+    def acquire(self, url: str, operation: str = None):
+        wait = self.reserve(url, operation)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def close(self):
+        for bucket in self.buckets.values():
+            if isinstance(bucket, FileTokenBucket):
+                bucket.close()
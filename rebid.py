@@ -0,0 +1,92 @@
+import bisect
+
+
+class IncrementTable:
+    # An auction's bidIncrements as parallel sorted tuples, so the increment
+    # for an amount is one bisect instead of a scan. Rows apply to amounts
+    # below their upToAmount; past the last row its increment still applies.
+    __slots__ = ("limits", "steps")
+
+    def __init__(self, increments):
+        # increments: ((upToAmount, minBidIncrement), ...) as on
+        # models.Auction, or the raw bidIncrements dicts
+        rows = sorted((row["upToAmount"], row["minBidIncrement"]) if isinstance(row, dict) else tuple(row)
+                      for row in increments)
+        if not rows:
+            raise ValueError("Auction has no bid increments")
+        self.limits = tuple(limit for limit, _ in rows)
+        self.steps = tuple(step for _, step in rows)
+
+    @classmethod
+    def from_auction(cls, auction):
+        if isinstance(auction, dict):
+            return cls(auction.get("bidIncrements") or ())
+        return cls(auction.bid_increments)
+
+    def increment(self, amount):
+        index = bisect.bisect_right(self.limits, amount)
+        return self.steps[min(index, len(self.steps) - 1)]
+
+    def next_bid(self, amount):
+        # smallest valid bid above a high bid of `amount`
+        return round(amount + self.increment(amount), 2)
+
+
+class RebidEngine:
+    # Keeps bidding on a lot while outbid, up to a ceiling. The next amount
+    # is the server's suggestedBid when it sends one, otherwise it is
+    # computed locally from the auction's increment table, so a rebid goes
+    # straight back out without first re-reading the lot. Tables are cached
+    # by auction id.
+    def __init__(self, api, max_rebids=20):
+        self.api = api
+        self.max_rebids = max_rebids
+        self.tables = {}
+
+    def table(self, auction):
+        auction_id = auction["id"] if isinstance(auction, dict) else auction.id
+        table = self.tables.get(auction_id)
+        if table is None:
+            table = self.tables[auction_id] = IncrementTable.from_auction(auction)
+        return table
+
+    @staticmethod
+    def next_amount(table, amount, suggested=None):
+        # after being outbid at `amount`
+        if suggested and suggested > amount:
+            return suggested
+        return table.next_bid(amount)
+
+    def bid(self, lot_id, amount, ceiling, auction):
+        # auction: models.Auction or an auction dict with bidIncrements.
+        # Returns {"lotId", "status", "amount", "attempts", "result"}; status
+        # is the last bidStatus, "CEILING" when the next valid bid would
+        # exceed the ceiling, or None when the bid was rejected as invalid.
+        # A FetchError from bid_on_lot propagates: the bid may have landed,
+        # so the caller reconciles before bidding again.
+        table = self.table(auction)
+        attempts = []
+        result = None
+        status = "CEILING"
+        while amount <= ceiling:
+            attempts.append(amount)
+            result = self.api.bid_on_lot(lot_id, amount, True)
+            status = result.get("bidStatus") if result else None
+            if status != "OUTBID" or len(attempts) > self.max_rebids:
+                break
+            amount = self.next_amount(table, amount, result.get("suggestedBid"))
+            if amount > ceiling:
+                status = "CEILING"
+        return {"lotId": lot_id, "status": status, "amount": attempts[-1] if attempts else None,
+                "attempts": attempts, "result": result}
+
+    def rebid_lot(self, lot, ceiling):
+        # reacts to an outbid lot dict (lot search or current bids result)
+        # carrying lotState and its auction: bids the lot's minBid, or one
+        # increment over highBid when minBid wasn't selected
+        state = lot.get("lotState") or {}
+        if state.get("isClosed") or state.get("buyerBidStatus") == "WINNING":
+            return None
+        table = self.table(lot["auction"])
+        amount = state.get("minBid") or table.next_bid(state.get("highBid") or 0)
+        return self.bid(lot["id"], amount, ceiling, lot["auction"])
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+import zipfile
+
+import requests
+
+# Record/replay for AmazonScraper. A transport is any callable
+# (url, headers) -> (status_code, content); AmazonScraper uses http_transport
+# unless given another one. RecordingTransport saves what the network
+# returns into a FixtureArchive, ReplayTransport serves it back offline.
+
+
+def http_transport(url, headers):
+    response = requests.get(url, headers=headers)
+    return response.status_code, response.content
+
+
+class FixtureArchive:
+    # Compressed zip of raw responses. Each entry is one URL's body, named
+    # by the URL's hash, with {"url", "status"} JSON in the entry comment,
+    # so recording can append to an existing archive.
+    def __init__(self, path, compression=zipfile.ZIP_LZMA):
+        self.path = path
+        self.compression = compression
+        self._lock = threading.Lock()
+        self.index = {}  # url -> (entry name, status)
+        try:
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    meta = json.loads(info.comment.decode())
+                    self.index[meta["url"]] = (info.filename, meta["status"])
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def entry_name(url):
+        return hashlib.sha1(url.encode()).hexdigest() + ".html"
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def urls(self):
+        return list(self.index)
+
+    def add(self, url, status, content):
+        with self._lock:
+            if url in self.index:
+                return
+            name = self.entry_name(url)
+            info = zipfile.ZipInfo(name)
+            info.compress_type = self.compression
+            info.comment = json.dumps({"url": url, "status": status}).encode()
+            with zipfile.ZipFile(self.path, "a", compression=self.compression) as archive:
+                archive.writestr(info, content or b"")
+            self.index[url] = (name, status)
+
+    def get(self, url):
+        # (status, content) or None when the URL was never recorded
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        name, status = entry
+        with zipfile.ZipFile(self.path) as archive:
+            return status, archive.read(name)
+
+    def items(self):
+        # every (url, status, content), reading the archive once
+        with zipfile.ZipFile(self.path) as archive:
+            for url, (name, status) in self.index.items():
+                yield url, status, archive.read(name)
+
+
+class RecordingTransport:
+    def __init__(self, archive, transport=http_transport):
+        self.archive = archive
+        self.transport = transport
+
+    def __call__(self, url, headers):
+        status, content = self.transport(url, headers)
+        self.archive.add(url, status, content)
+        return status, content
+
+
+class ReplayTransport:
+    # strict: raise on URLs missing from the archive instead of answering 404
+    def __init__(self, archive, strict=False):
+        self.archive = archive
+        self.strict = strict
+        self.cache = {}
+
+    def __call__(self, url, headers):
+        response = self.cache.get(url)
+        if response is None:
+            response = self.archive.get(url)
+            if response is None:
+                if self.strict:
+                    raise KeyError(f"No recorded response for {url}")
+                return 404, None
+            self.cache[url] = response
+        return response
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from amazon import AmazonScraper
+
+    parser = argparse.ArgumentParser(description="Record amazon.ca search pages into a fixture archive")
+    parser.add_argument("archive")
+    parser.add_argument("products", nargs="+")
+    parser.add_argument("--user-agent", default="")
+    args = parser.parse_args()
+
+    fixtures = FixtureArchive(args.archive)
+    scraper = AmazonScraper(args.user_agent, transport=RecordingTransport(fixtures))
+    for product in args.products:
+        print(f"{product}: {len(scraper.scrape(product))} products")
+    print(f"{len(fixtures)} responses in {args.archive}")
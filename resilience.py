@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Statuses worth another attempt: rate limiting and transient upstream
+# failures. Any other 4xx is our request's fault and fails at once.
+RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+# Mutations that must not be sent twice: a LotBid whose response was lost
+# may already have been placed
+NON_IDEMPOTENT_OPERATIONS = frozenset(("LotBid",))
+# (connect, read) seconds per attempt
+DEFAULT_TIMEOUT = (3.05, 30.0)
+
+
+class FetchError(Exception):
+    # A failed GraphQL request. status is the HTTP status (None when no
+    # response arrived), retry_after the server's Retry-After in seconds.
+    # maybe_sent is False only when the server certainly did not act on
+    # the request (connection never opened, or 429), which is what makes
+    # retrying a mutation safe.
+    def __init__(self, message, operation=None, status=None, retry_after=None, maybe_sent=True):
+        super().__init__(message)
+        self.operation = operation
+        self.status = status
+        self.retry_after = retry_after
+        self.maybe_sent = maybe_sent
+
+    @property
+    def server_failure(self):
+        # counts against the endpoint's circuit breaker
+        return self.status is None or self.status in RETRY_STATUSES
+
+
+class CircuitOpenError(FetchError):
+    def __init__(self, operation, retry_in):
+        super().__init__(f"Circuit open for {operation}, retry in {retry_in:.1f}s", operation, maybe_sent=False)
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value, now=None):
+    # Retry-After is either delay-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    # Jittered exponential backoff ("full jitter": a uniform delay up to
+    # base_delay * 2**attempt, capped at max_delay). A Retry-After from
+    # the server replaces the computed delay, up to max_retry_after.
+    def __init__(self, max_attempts=4, base_delay=0.25, max_delay=8.0, max_retry_after=60.0,
+                 retry_statuses=RETRY_STATUSES, non_idempotent=NON_IDEMPOTENT_OPERATIONS, rand=random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+        self.non_idempotent = non_idempotent
+        self.rand = rand
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return self.rand() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def next_delay(self, error, attempt):
+        # seconds to wait before attempt `attempt + 1`, or None to give up
+        if attempt >= self.max_attempts or isinstance(error, CircuitOpenError):
+            return None
+        if error.status is not None and error.status not in self.retry_statuses:
+            return None
+        if error.operation in self.non_idempotent and error.maybe_sent:
+            return None
+        if error.retry_after is not None and error.retry_after > self.max_retry_after:
+            return None
+        return self.backoff(attempt, error.retry_after)
+
+
+class CircuitBreaker:
+    # closed: requests flow, consecutive failures are counted. After
+    # failure_threshold of them the circuit opens and requests fail fast
+    # for reset_timeout seconds; then a single probe is let through
+    # (half-open) and its outcome closes or re-opens the circuit.
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, error=None):
+        # outcome of an allowed request; client errors (4xx) show the
+        # endpoint is up and count as success
+        with self._lock:
+            self._probing = False
+            if error is None or not error.server_failure:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class BreakerRegistry:
+    # One CircuitBreaker per endpoint key, created on first use
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            return breaker
+
+    def states(self):
+        return {key: breaker.state for key, breaker in self.breakers.items()}
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Resale value of an item relative to new, by listed condition
+CONDITION_MULTIPLIERS = {
+    "New": 1.0,
+    "Like New": 0.9,
+    "Used - Very Good": 0.8,
+    "Used - Good": 0.7,
+    "Used - Acceptable": 0.5,
+}
+# for conditions not in the table
+DEFAULT_CONDITION_MULTIPLIER = 0.5
+
+# Condition codes index CONDITIONS; the extra last code is "unknown"
+CONDITIONS = tuple(CONDITION_MULTIPLIERS)
+UNKNOWN_CONDITION = len(CONDITIONS)
+_CONDITION_CODES = {condition: code for code, condition in enumerate(CONDITIONS)}
+_MULTIPLIERS = np.array([CONDITION_MULTIPLIERS[c] for c in CONDITIONS] + [DEFAULT_CONDITION_MULTIPLIER])
+
+
+def condition_codes(conditions):
+    # condition strings -> int8 codes for score_batch
+    return np.fromiter((_CONDITION_CODES.get(c, UNKNOWN_CONDITION) for c in conditions), dtype=np.int8)
+
+
+def score_batch(base_price, condition, amazon_price, shipping=0.0, fees=0.0, min_profit=20):
+    # Vectorised analyze.evaluate_product over columns: every argument is
+    # an array (or a scalar applied to all rows); condition holds codes
+    # from condition_codes; a NaN amazon_price means no price was found.
+    # Returns the ranked table: a dict of equal-length columns sorted by
+    # margin_pct, best first, with "index" pointing back at input rows.
+    base_price, condition, amazon_price, shipping, fees = np.broadcast_arrays(
+        np.asarray(base_price, dtype=np.float64), np.asarray(condition, dtype=np.intp),
+        np.asarray(amazon_price, dtype=np.float64), np.asarray(shipping, dtype=np.float64),
+        np.asarray(fees, dtype=np.float64))
+
+    adjusted_price = base_price * _MULTIPLIERS[condition]
+    total_cost = adjusted_price + shipping + fees
+    margin = amazon_price - total_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margin_pct = margin / total_cost * 100
+    priced = ~np.isnan(amazon_price)
+    resell = priced & (margin_pct >= min_profit)
+
+    # NaN (unpriced) rows sort last
+    order = np.argsort(np.where(priced, -margin_pct, np.inf), kind="stable")
+    return {
+        "index": order,
+        "adjusted_price": adjusted_price[order],
+        "total_cost": total_cost[order],
+        "amazon_price": amazon_price[order],
+        "margin": margin[order],
+        "margin_pct": margin_pct[order],
+        "resell": resell[order],
+    }
+
+
+def top(table, k=None, resell_only=True):
+    # first k rows of a score_batch table as dicts
+    rows = np.flatnonzero(table["resell"]) if resell_only else np.arange(len(table["index"]))
+    if k is not None:
+        rows = rows[:k]
+    columns = list(table)
+    return [{column: table[column][row].item() for column in columns} for row in rows]
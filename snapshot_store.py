@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import time
+
+
+def merge_lot(stored, lot):
+    # stored with lot's fields laid over it, nested dicts merged key by key
+    merged = dict(stored)
+    for key, value in lot.items():
+        old = merged.get(key)
+        merged[key] = merge_lot(old, value) if isinstance(old, dict) and isinstance(value, dict) else value
+    return merged
+
+
+class SnapshotStore:
+    # On-disk snapshot of fetched lots keyed by (auction id, lot id), so a
+    # restart can reload the last crawl instead of re-fetching it. Lots are
+    # written in executemany batches while a crawl streams through record().
+    def __init__(self, path="snapshots.db", batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS lots (
+                auction_id INTEGER NOT NULL,
+                lot_id INTEGER NOT NULL,
+                lot_number TEXT,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (auction_id, lot_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS auctions (
+                auction_id INTEGER PRIMARY KEY,
+                synced_at REAL NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _row(self, lot, auction_id, now):
+        if auction_id is None:
+            auction_id = lot["auction"]["id"]
+        return auction_id, lot["id"], now, lot
+
+    def _stored(self, rows):
+        # {(auction id, lot id): stored lot} for the lots in rows
+        stored = {}
+        for auction_id in {row[0] for row in rows}:
+            lot_ids = [row[1] for row in rows if row[0] == auction_id]
+            query = f"SELECT lot_id, data FROM lots WHERE auction_id = ? AND lot_id IN ({','.join('?' * len(lot_ids))})"
+            for lot_id, data in self.conn.execute(query, (auction_id, *lot_ids)):
+                stored[auction_id, lot_id] = json.loads(data)
+        return stored
+
+    def _write(self, rows, merge=False):
+        if not rows:
+            return
+        with self.conn:
+            stored = self._stored(rows) if merge else {}
+            lots = []
+            synced = {}
+            for auction_id, lot_id, updated_at, lot in rows:
+                old = stored.get((auction_id, lot_id))
+                if old is not None:
+                    lot = merge_lot(old, lot)
+                lots.append((auction_id, lot_id, lot.get("lotNumber"), updated_at,
+                             json.dumps(lot, separators=(",", ":"))))
+                synced[auction_id] = max(updated_at, synced.get(auction_id, updated_at))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO lots (auction_id, lot_id, lot_number, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                lots)
+            self.conn.executemany("INSERT OR REPLACE INTO auctions (auction_id, synced_at) VALUES (?, ?)",
+                                  synced.items())
+
+    def record(self, lots, auction_id=None, merge=False):
+        # pass-through generator:
+        #   for lot in store.record(api.iter_auction_products(auction_id)): ...
+        # auction_id is only needed when the lots don't carry auction.id.
+        # With merge, each lot is laid over its stored copy (merge_lot), so
+        # a slim projection updates its fields without dropping the rest.
+        rows = []
+        try:
+            for lot in lots:
+                rows.append(self._row(lot, auction_id, time.time()))
+                if len(rows) >= self.batch_size:
+                    self._write(rows, merge)
+                    rows = []
+                yield lot
+        finally:
+            self._write(rows, merge)
+
+    def save(self, lots, auction_id=None, merge=False):
+        count = 0
+        for _ in self.record(lots, auction_id, merge):
+            count += 1
+        return count
+
+    def load(self, auction_id):
+        rows = self.conn.execute("SELECT data FROM lots WHERE auction_id = ? ORDER BY lot_id", (auction_id,))
+        return [json.loads(data) for data, in rows]
+
+    def load_with_times(self, auction_id):
+        # [(lot, updated_at), ...] with updated_at as time.time() seconds
+        rows = self.conn.execute("SELECT data, updated_at FROM lots WHERE auction_id = ? ORDER BY lot_id",
+                                 (auction_id,))
+        return [(json.loads(data), updated_at) for data, updated_at in rows]
+
+    def last_synced(self, auction_id):
+        row = self.conn.execute("SELECT synced_at FROM auctions WHERE auction_id = ?", (auction_id,)).fetchone()
+        return row[0] if row else None
+
+    def auction_ids(self):
+        return [auction_id for auction_id, in self.conn.execute("SELECT auction_id FROM auctions ORDER BY auction_id")]
+
+    def delete_auction(self, auction_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM lots WHERE auction_id = ?", (auction_id,))
+            self.conn.execute("DELETE FROM auctions WHERE auction_id = ?", (auction_id,))
@@ -0,0 +1,245 @@
+import heapq
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Fields refresh_auction asks LotSearch for
+SNIPE_LOT_FIELDS = ("id", "lotState.timeLeftSeconds", "lotState.isClosed")
+
+
+class ArmedBid:
+    __slots__ = ("lot_id", "max_amount", "fire_before", "auction_id", "close_at", "fire_at", "version", "dispatched",
+                 "fired_at", "result", "error", "cancelled")
+
+    def __init__(self, lot_id, max_amount, fire_before, auction_id=None):
+        self.lot_id = lot_id
+        self.max_amount = max_amount
+        self.fire_before = fire_before
+        self.auction_id = auction_id
+        self.close_at = None
+        self.fire_at = None
+        self.version = 0
+        self.dispatched = False
+        self.fired_at = None
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+    @property
+    def jitter(self):
+        # seconds between the planned and the actual send time
+        if self.fired_at is None:
+            return None
+        return self.fired_at - self.fire_at
+
+    def __repr__(self):
+        return f"ArmedBid(lot_id={self.lot_id!r}, max_amount={self.max_amount!r}, fire_at={self.fire_at!r})"
+
+
+class BidScheduler:
+    # Fires bid_on_lot for many armed lots at precise monotonic deadlines.
+    #
+    # Each lot's close time is derived from a timeLeftSeconds observation:
+    # the server computed it somewhere between our send and receive, so we
+    # anchor it at the midpoint, which corrects for our clock and network
+    # delay without trusting wall clocks. The bid is sent at
+    #   close - fire_before - (estimated one-way latency)
+    # A single scheduler thread waits on a heap of deadlines (coarse sleep,
+    # then a short spin) and hands due bids to a pre-started worker pool.
+    # warm_lead seconds before firing, the connection is pre-warmed with a
+    # HEAD request, which also refreshes the round-trip estimate.
+    #
+    # Soft close needs no special handling: a bid that extends a lot shows
+    # up as a later timeLeftSeconds, so refresh_auction (or observe) before
+    # the deadline reschedules it.
+    def __init__(self, api, max_workers=32, warm_lead=5.0, spin=0.002, clock=time.monotonic):
+        self.api = api
+        self.warm_lead = warm_lead
+        self.spin = spin
+        self.clock = clock
+        self.rtt = None
+        self.armed = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bid")
+        # start the workers now so the first bid doesn't pay thread start-up
+        for _ in range(max_workers):
+            self._executor.submit(time.sleep, 0)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="bid-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _record_rtt(self, rtt):
+        self.rtt = rtt if self.rtt is None else 0.8 * self.rtt + 0.2 * rtt
+
+    def arm(self, lot_id, max_amount, fire_before=2.0, time_left_seconds=None, sent_at=None, received_at=None,
+            auction_id=None):
+        # time_left_seconds with the send/receive clock() times of the
+        # response it came from; without them the observation is taken as
+        # current. auction_id lets refresh_auction track the lot.
+        with self._cond:
+            armed = self.armed.get(lot_id)
+            if armed is None:
+                armed = self.armed[lot_id] = ArmedBid(lot_id, max_amount, fire_before, auction_id)
+            else:
+                armed.max_amount, armed.fire_before = max_amount, fire_before
+                armed.auction_id = auction_id or armed.auction_id
+        if time_left_seconds is not None:
+            self.observe(lot_id, time_left_seconds, sent_at, received_at)
+        return armed
+
+    def arm_lot(self, lot, max_amount, fire_before=2.0, sent_at=None, received_at=None):
+        state = lot.get("lotState") or {}
+        auction = lot.get("auction") or {}
+        return self.arm(lot["id"], max_amount, fire_before, state.get("timeLeftSeconds"), sent_at, received_at,
+                        auction.get("id"))
+
+    def observe(self, lot_id, time_left_seconds, sent_at=None, received_at=None):
+        now = self.clock()
+        sent_at = now if sent_at is None else sent_at
+        received_at = sent_at if received_at is None else received_at
+        with self._cond:
+            armed = self.armed.get(lot_id)
+            if armed is None or armed.cancelled or armed.dispatched:
+                return
+            if received_at > sent_at:
+                self._record_rtt(received_at - sent_at)
+            armed.close_at = (sent_at + received_at) / 2 + time_left_seconds
+            self._schedule(armed)
+
+    def _schedule(self, armed):
+        # called with the lock held; older heap entries for the lot go stale
+        # through the version bump
+        one_way = (self.rtt or 0) / 2
+        armed.fire_at = armed.close_at - armed.fire_before - one_way
+        armed.version += 1
+        heapq.heappush(self._heap, (armed.fire_at, next(self._seq), "bid", armed, armed.version))
+        if self.warm_lead:
+            warm_at = armed.fire_at - self.warm_lead
+            heapq.heappush(self._heap, (warm_at, next(self._seq), "warm", armed, armed.version))
+        self._cond.notify()
+
+    def cancel(self, lot_id):
+        with self._cond:
+            armed = self.armed.pop(lot_id, None)
+            if armed is not None:
+                armed.cancelled = True
+                self._cond.notify()
+        return armed
+
+    def refresh_auction(self, auction_id, page_length=100):
+        # re-reads timeLeftSeconds for every armed lot of the auction, one
+        # timed LotSearch page at a time, and reschedules them (soft-close
+        # extensions included)
+        with self._cond:
+            wanted = {lot_id for lot_id, armed in self.armed.items() if armed.auction_id == auction_id}
+        page_number = 1
+        while wanted:
+            sent_at = self.clock()
+            data = self.api.search_auction_products(auction_id, page_number=page_number, page_length=page_length,
+                                                    fields=SNIPE_LOT_FIELDS)
+            received_at = self.clock()
+            for lot in data['pagedResults']['results']:
+                if lot["id"] in wanted:
+                    wanted.discard(lot["id"])
+                    self.observe(lot["id"], lot["lotState"]["timeLeftSeconds"], sent_at, received_at)
+            if data['pagedResults']['filteredCount'] <= page_number * page_length:
+                break
+            page_number += 1
+
+    def _warm(self):
+        sent_at = self.clock()
+        try:
+            self.api.session.head(self.api.base_url, headers=self.api.headers)
+        except Exception as e:
+            print(f"Connection warm-up failed: {e}")
+            return
+        with self._cond:
+            self._record_rtt(self.clock() - sent_at)
+
+    def _fire(self, armed):
+        armed.fired_at = self.clock()
+        try:
+            armed.result = self.api.bid_on_lot(armed.lot_id, armed.max_amount, True)
+        except Exception as e:
+            # too late to retry; kept for the caller to reconcile (a
+            # FetchError, or anything else from a malformed response)
+            armed.error = e
+            print(f"Bid on lot {armed.lot_id} failed: {e}")
+        return armed.result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    # drop stale and cancelled entries
+                    while self._heap and (self._heap[0][3].cancelled or self._heap[0][4] != self._heap[0][3].version):
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - self.clock()
+                    if delay <= self.spin:
+                        break
+                    self._cond.wait(delay - self.spin)
+                if not self._running:
+                    return
+                at, _, kind, armed, version = heapq.heappop(self._heap)
+                if kind == "bid":
+                    armed.dispatched = True
+
+            # spin out the last couple of milliseconds for a precise send
+            while self.clock() < at:
+                pass
+            if armed.cancelled:
+                continue
+            if kind == "bid":
+                self._executor.submit(self._fire, armed)
+            else:
+                self._executor.submit(self._warm)
+
+    def pending(self):
+        with self._cond:
+            entries = list(self.armed.values())
+        return [armed for armed in entries if not armed.dispatched and not armed.cancelled]
+
+    def jitter_report(self):
+        # achieved firing jitter (actual minus planned send time) in ms
+        with self._cond:
+            entries = list(self.armed.values())
+        jitters = [armed.jitter * 1000 for armed in entries if armed.fired_at is not None]
+        if not jitters:
+            return {"fired": 0}
+        jitters.sort()
+        return {
+            "fired": len(jitters),
+            "mean_ms": statistics.fmean(jitters),
+            "p50_ms": jitters[len(jitters) // 2],
+            "p95_ms": jitters[min(len(jitters) - 1, int(len(jitters) * 0.95))],
+            "max_ms": jitters[-1],
+        }
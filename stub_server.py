@@ -0,0 +1,536 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Local stand-in for the HiBid GraphQL endpoint so ApiWrapper can be
+# benchmarked without touching liquidationmaxinc.hibid.com.
+
+
+def make_auctioneer(auctioneer_id):
+    return {
+        "address": "100 Warehouse Rd",
+        "bidIncrementDisclaimer": "",
+        "buyerRegNotesCaption": "",
+        "city": "Toronto",
+        "countryId": 2,
+        "country": "Canada",
+        "cRMID": f"CRM{auctioneer_id}",
+        "email": "info@example.com",
+        "fax": "",
+        "id": auctioneer_id,
+        "internetAddress": "https://liquidationmaxinc.hibid.com",
+        "missingThumbnail": "",
+        "name": "Liquidation Max Inc",
+        "noMinimumCaption": "",
+        "phone": "555-0100",
+        "state": "ON",
+        "postalCode": "M1M 1M1",
+        "__typename": "Auctioneer",
+    }
+
+
+def make_picture(auction_id, number):
+    base = f"https://cdn.example.com/{auction_id}/{number}"
+    return {
+        "description": "",
+        "fullSizeLocation": f"{base}/full.jpg",
+        "height": 768,
+        "hdThumbnailLocation": f"{base}/hd.jpg",
+        "thumbnailLocation": f"{base}/thumb.jpg",
+        "width": 1024,
+        "__typename": "Picture",
+    }
+
+
+def make_auction(auction_id, lot_count, auctioneer_id=1):
+    return {
+        "id": auction_id,
+        "altBiddingUrl": None,
+        "altBiddingUrlCaption": None,
+        "amexAccepted": False,
+        "discoverAccepted": False,
+        "mastercardAccepted": True,
+        "visaAccepted": True,
+        "regType": "STANDARD",
+        "holdAmount": 0,
+        "auctioneer": make_auctioneer(auctioneer_id),
+        "auctionOptions": {
+            "bidding": True,
+            "altBidding": False,
+            "catalog": True,
+            "liveCatalog": False,
+            "shippingType": "NONE",
+            "preview": True,
+            "registration": True,
+            "webcast": False,
+            "useLotNumber": True,
+            "useSaleOrder": False,
+            "__typename": "AuctionOptions",
+        },
+        "auctionState": {
+            "auctionStatus": "OPEN",
+            "bidCardNumber": None,
+            "isRegistered": True,
+            "openLotCount": lot_count,
+            "timeToOpen": 0,
+            "__typename": "AuctionState",
+        },
+        "bidAmountType": "PER_ITEM",
+        "bidIncrements": [
+            {"minBidIncrement": 1, "upToAmount": 50, "__typename": "BidIncrement"},
+            {"minBidIncrement": 2.5, "upToAmount": 200, "__typename": "BidIncrement"},
+            {"minBidIncrement": 5, "upToAmount": 1000, "__typename": "BidIncrement"},
+            {"minBidIncrement": 10, "upToAmount": 9999999, "__typename": "BidIncrement"},
+        ],
+        "bidOpenDateTime": "2024-01-01T12:00:00",
+        "bidCloseDateTime": "2024-01-08T19:00:00",
+        "bidType": "INTERNET",
+        "buyerPremium": "15% Buyer's Premium",
+        "buyerPremiumRate": 15.0,
+        "checkoutDateInfo": "Pickup Tuesday 10am - 4pm",
+        "previewDateInfo": "Preview Monday 10am - 4pm",
+        "currencyAbbreviation": "CAD",
+        "description": "Weekly returns liquidation auction.",
+        "eventAddress": "100 Warehouse Rd",
+        "eventCity": "Toronto",
+        "eventDateBegin": "2024-01-01T12:00:00",
+        "eventDateEnd": "2024-01-08T19:00:00",
+        "eventDateInfo": "Bidding closes Monday at 7pm",
+        "eventName": f"Weekly Liquidation #{auction_id}",
+        "eventState": "ON",
+        "eventZip": "M1M 1M1",
+        "featuredPicture": make_picture(auction_id, 0),
+        "links": [],
+        "lotCount": lot_count,
+        "showBuyerPremium": True,
+        "audioVideoChatInfo": {"aVCEnabled": False, "blockChat": True, "__typename": "AudioVideoChatInfo"},
+        "hidden": False,
+        "sourceType": "HIBID",
+        "distanceMiles": 0,
+        "__typename": "Auction",
+    }
+
+
+def make_lot_state(lot_number):
+    high_bid = float(lot_number % 97 + 1)
+    return {
+        "bidCount": lot_number % 7,
+        "biddingExtended": False,
+        "bidMax": 0,
+        "bidMaxTotal": 0,
+        "buyerBidStatus": "NONE",
+        "buyerHighBid": 0,
+        "buyerHighBidTotal": 0,
+        "buyNow": 0,
+        "choiceType": "NONE",
+        "highBid": high_bid,
+        "highBuyerId": 1000 + lot_number,
+        "isArchived": False,
+        "isClosed": False,
+        "isHidden": False,
+        "isLive": False,
+        "isNotYetLive": False,
+        "isOnLiveCatalog": False,
+        "isPosted": True,
+        "isPublicHidden": False,
+        "isRegistered": True,
+        "isWatching": False,
+        "linkedSoftClose": False,
+        "mayHaveWonStatus": False,
+        "minBid": high_bid + 1,
+        "priceRealized": 0,
+        "priceRealizedMessage": "",
+        "priceRealizedPerEach": 0,
+        "productStatus": "OPEN",
+        "productUrl": "",
+        "quantitySold": 0,
+        "reserveSatisfied": True,
+        "sealed": False,
+        "showBidStatus": True,
+        "showReserveStatus": False,
+        "softCloseMinutes": 3,
+        "softCloseSeconds": 180,
+        "status": "OPEN",
+        "timeLeft": "2d 4h",
+        "timeLeftLead": "Closes in",
+        "timeLeftSeconds": 3600 + lot_number * 10,
+        "timeLeftTitle": "Time Left",
+        "timeLeftWithLimboSeconds": 3600 + lot_number * 10,
+        "watchNotes": None,
+        "__typename": "LotState",
+    }
+
+
+def make_lot(auction, lot_number):
+    auction_id = auction["id"]
+    return {
+        "auction": auction,
+        "bidAmount": 0,
+        "bidList": "",
+        "bidQuantity": 1,
+        "description": f"Returned item in open box, untested. Lot {lot_number} of auction {auction_id}.",
+        "estimate": "",
+        "featuredPicture": make_picture(auction_id, lot_number),
+        "forceLiveCatalog": False,
+        "fr8StarUrl": "",
+        "hideLeadWithDescription": False,
+        "id": auction_id * 100000 + lot_number,
+        "itemId": auction_id * 100000 + lot_number,
+        "lead": f"Echo Dot (3rd Gen) Smart Speaker #{lot_number}",
+        "links": [],
+        "linkTypes": "",
+        "lotNumber": str(lot_number),
+        "lotState": make_lot_state(lot_number),
+        "pictureCount": 1,
+        "quantity": 1,
+        "ringNumber": 1,
+        "rv": "",
+        "shippingOffered": False,
+        "simulcastStatus": "NONE",
+        "site": {
+            "domain": "liquidationmaxinc.hibid.com",
+            "fr8StarUrl": "",
+            "isDomainRequest": False,
+            "isExtraWWWRequest": False,
+            "siteType": "HIBID",
+            "subdomain": "liquidationmaxinc",
+            "__typename": "Site",
+        },
+        "distanceMiles": 0,
+        "__typename": "Lot",
+    }
+
+
+# Minimal GraphQL selection-set reader: enough to trim stub responses down to
+# the fields a query asked for, so payload sizes match what HiBid would send.
+
+_TOKEN_RE = re.compile(r"\.\.\.|[{}():]|[A-Za-z_][A-Za-z0-9_]*|\$|[^\s,]")
+
+
+def _skip_parens(tokens, i):
+    depth = 0
+    while True:
+        if tokens[i] == "(":
+            depth += 1
+        elif tokens[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+
+
+def _parse_selection(tokens, i):
+    # tokens[i] == "{"; returns (selection, index after the closing brace)
+    selection = []
+    i += 1
+    while tokens[i] != "}":
+        if tokens[i] == "...":
+            if tokens[i + 1] == "on":
+                type_name = tokens[i + 2]
+                sub, i = _parse_selection(tokens, i + 3)
+                selection.append(("inline", type_name, sub))
+            else:
+                selection.append(("spread", tokens[i + 1], None))
+                i += 2
+            continue
+        name = tokens[i]
+        i += 1
+        if tokens[i] == ":":
+            name = tokens[i + 1]
+            i += 2
+        if tokens[i] == "(":
+            i = _skip_parens(tokens, i)
+        sub = None
+        if tokens[i] == "{":
+            sub, i = _parse_selection(tokens, i)
+        selection.append(("field", name, sub))
+    return selection, i + 1
+
+
+def parse_query(query):
+    tokens = _TOKEN_RE.findall(query)
+    operation = None
+    fragments = {}
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == "fragment":
+            name, type_name = tokens[i + 1], tokens[i + 3]
+            sub, i = _parse_selection(tokens, i + 4)
+            fragments[name] = (type_name, sub)
+        elif tokens[i] == "(":
+            i = _skip_parens(tokens, i)
+        elif tokens[i] == "{":
+            operation, i = _parse_selection(tokens, i)
+        else:
+            i += 1
+    return operation, fragments
+
+
+def project(value, selection, fragments):
+    if selection is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, selection, fragments) for item in value]
+    out = {}
+    for kind, name, sub in selection:
+        if kind == "field":
+            out[name] = project(value.get(name), sub, fragments)
+            continue
+        if kind == "spread":
+            name, sub = fragments[name]
+        if value.get("__typename", name) == name:
+            out.update(project(value, sub, fragments))
+    return out
+
+
+class StubHiBidServer:
+    # Serves LotSearch, CurrentBidsSearch and LotBid over synthetic auctions.
+    # Lots close `duration` seconds after start (staggered by `stagger` per
+    # lot number) and timeLeftSeconds counts down in real time; a bid inside
+    # the soft-close window pushes the close out. `latency` (+ up to
+    # `latency_jitter`) seconds are added to every request and `error_rate`
+    # of requests fail with `error_status`. Operations named in
+    # `graphql_errors` answer 200 with a GraphQL error and "data": null.
+    def __init__(self, host="127.0.0.1", port=0, lot_count=500, auction_id=1, auction_count=1, latency=0.0,
+                 latency_jitter=0.0, error_rate=0.0, error_status=503, retry_after=None, duration=3600.0,
+                 stagger=10.0, current_bid_count=0, seed=None, graphql_errors=()):
+        self.lot_count = lot_count
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.graphql_errors = set(graphql_errors)
+        self.auction_id = auction_id
+        self.auctions = {}
+        self.lots_by_auction = {}
+        self.lots_by_id = {}
+        self.close_at = {}
+        started = time.monotonic()
+        for aid in range(auction_id, auction_id + auction_count):
+            auction = self.auctions[aid] = make_auction(aid, lot_count)
+            lots = self.lots_by_auction[aid] = [make_lot(auction, n) for n in range(1, lot_count + 1)]
+            for n, lot in enumerate(lots, 1):
+                self.lots_by_id[lot["id"]] = lot
+                self.close_at[lot["id"]] = started + duration + n * stagger
+        self.auction = self.auctions[auction_id]
+        self.lots = [lot for lots in self.lots_by_auction.values() for lot in lots]
+        # lot id -> our (the authenticated buyer's) last bid
+        self.bids = {lot["id"]: lot["lotState"]["minBid"] for lot in self.lots[:current_bid_count]}
+        self.request_count = 0
+        self.error_count = 0
+        self._random = random.Random(seed)
+        self._parsed_queries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.error_count += 1
+            return failed
+
+    def handle(self, payload):
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + (self._random.random() * self.latency_jitter if self.latency_jitter else 0)
+        if delay:
+            time.sleep(delay)
+        operation_name = payload.get("operationName")
+        variables = payload.get("variables") or {}
+        if operation_name in self.graphql_errors:
+            return {"errors": [{"message": "Injected GraphQL error", "path": [operation_name]}], "data": None}
+        if operation_name == "LotSearch":
+            data = {"lotSearch": self.lot_search(variables)}
+        elif operation_name == "CurrentBidsSearch":
+            data = {"currentBids": self.current_bids(variables)}
+        elif operation_name == "LotBid":
+            data = {"bid": self.bid(variables)}
+        else:
+            return {"errors": [{"message": f"Unknown operation {operation_name}"}]}
+
+        query = payload.get("query") or ""
+        parsed = self._parsed_queries.get(query)
+        if parsed is None:
+            parsed = self._parsed_queries[query] = parse_query(query)
+        selection, fragments = parsed
+        return {"data": project(data, selection, fragments)}
+
+    def _refresh(self, lots):
+        # bring timeLeftSeconds / isClosed up to date for the lots we return
+        now = time.monotonic()
+        for lot in lots:
+            state = lot["lotState"]
+            left = max(0, int(self.close_at[lot["id"]] - now))
+            state["timeLeftSeconds"] = state["timeLeftWithLimboSeconds"] = left
+            if left == 0:
+                state["isClosed"] = True
+                state["status"] = "CLOSED"
+        return lots
+
+    def paged(self, items, variables):
+        page_number = variables.get("pageNumber", 1)
+        page_length = variables.get("pageLength", 100)
+        start = (page_number - 1) * page_length
+        return {
+            "pageLength": page_length,
+            "pageNumber": page_number,
+            "totalCount": len(items),
+            "filteredCount": len(items),
+            "results": self._refresh(items[start:start + page_length]),
+            "__typename": "PagedResults",
+        }
+
+    def lot_search(self, variables):
+        auction_id = variables.get("auctionId")
+        lots = self.lots_by_auction.get(auction_id, []) if auction_id else self.lots
+        return {"pagedResults": self.paged(lots, variables), "__typename": "LotSearchResult"}
+
+    def current_bids(self, variables):
+        auction_id = variables.get("auctionId")
+        with self._lock:
+            lots = [self.lots_by_id[lot_id] for lot_id in sorted(self.bids)]
+        if auction_id:
+            lots = [lot for lot in lots if lot["auction"]["id"] == auction_id]
+        if variables.get("hideClosedLots"):
+            lots = [lot for lot in self._refresh(lots) if not lot["lotState"]["isClosed"]]
+        auction_ids = sorted({lot["auction"]["id"] for lot in lots})
+        return {
+            "auctions": [self.auctions[aid] for aid in auction_ids],
+            "pagedResults": self.paged(lots, variables),
+            "__typename": "CurrentBidsResult",
+        }
+
+    def next_increment(self, auction, amount):
+        for row in auction["bidIncrements"]:
+            if amount < row["upToAmount"]:
+                return row["minBidIncrement"]
+        return auction["bidIncrements"][-1]["minBidIncrement"]
+
+    def bid(self, variables):
+        lot = self.lots_by_id.get(variables.get("lotId"))
+        if lot is None:
+            return {"messages": ["Lot not found"], "errors": [{"fieldName": "lotId", "messages": ["Lot not found"]}],
+                    "__typename": "InvalidInputError"}
+        amount = float(variables.get("bidAmount") or 0)
+        with self._lock:
+            state = self._refresh([lot])[0]["lotState"]
+            if state["isClosed"]:
+                status, message = "CLOSED", "Bidding has closed"
+            elif amount < state["minBid"]:
+                status, message = "OUTBID", f"Bid must be at least {state['minBid']}"
+            else:
+                status, message = "WINNING", "You are the high bidder"
+                state["highBid"] = amount
+                state["bidCount"] += 1
+                state["buyerHighBid"] = amount
+                state["minBid"] = amount + self.next_increment(lot["auction"], amount)
+                self.bids[lot["id"]] = amount
+                soft_close = state["softCloseSeconds"]
+                now = time.monotonic()
+                if soft_close and self.close_at[lot["id"]] - now < soft_close:
+                    self.close_at[lot["id"]] = now + soft_close
+                    state["biddingExtended"] = True
+            state["buyerBidStatus"] = status
+            return {
+                "bidStatus": status,
+                "suggestedBid": state["minBid"],
+                "bidMessage": message,
+                "lot": lot,
+                "__typename": "BidResultType",
+            }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-alive responses are written in two segments (headers,
+            # body); without TCP_NODELAY delayed ACKs add ~40ms per call
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if stub.should_fail():
+                    body = json.dumps({"errors": [{"message": "Injected failure"}]}).encode()
+                    self.send_response(stub.error_status)
+                    if stub.retry_after is not None:
+                        self.send_header("Retry-After", str(stub.retry_after))
+                else:
+                    body = json.dumps(stub.handle(payload)).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client gave up (timeout checks, cancelled tasks)
+                    self.close_connection = True
+
+            def do_HEAD(self):
+                # lets clients open / warm a keep-alive connection cheaply
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stub HiBid GraphQL server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--lots", type=int, default=500, help="lots per auction")
+    parser.add_argument("--auctions", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--current-bids", type=int, default=0, help="lots the buyer has already bid on")
+    args = parser.parse_args()
+
+    server = StubHiBidServer(port=args.port, lot_count=args.lots, auction_count=args.auctions, latency=args.latency,
+                             latency_jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+                             current_bid_count=args.current_bids)
+    print(f"Serving {args.auctions} auction(s) of {args.lots} lots on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AuctionSync:
+    # Incremental watcher for one auction. It remembers the last-seen
+    # lotState of every lot and each poll() only returns lots whose state
+    # moved. Pages are re-fetched on their own schedule: the closer the
+    # soonest-closing open lot on a page is to its close, the sooner that
+    # page is polled again.
+    def __init__(self, api, auction_id, page_length=100, fields="slim", min_interval=2.0, max_interval=300.0,
+                 interval_fraction=0.1, drift_tolerance=5, max_workers=1, snapshot=None, clock=time.monotonic):
+        self.api = api
+        self.auction_id = auction_id
+        self.page_length = page_length
+        self.fields = fields
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # a page with T seconds left on its soonest lot is polled every
+        # T * interval_fraction seconds, clamped to [min_interval, max_interval]
+        self.interval_fraction = interval_fraction
+        # seconds timeLeftSeconds may differ from the locally extrapolated
+        # value before we treat it as a soft-close extension
+        self.drift_tolerance = drift_tolerance
+        self.max_workers = max_workers
+        # optional SnapshotStore; changed lots are written to it every poll
+        self.snapshot = snapshot
+        self.clock = clock
+
+        # lot id -> (bidCount, highBid, isClosed, timeLeftSeconds, seen at)
+        self.last_seen = {}
+        # page number -> clock() time it is next due; pages whose lots are
+        # all closed are dropped
+        self.page_due = {1: 0.0}
+        self.page_count = 1
+
+    @classmethod
+    def from_snapshot(cls, api, snapshot, auction_id, **kwargs):
+        # warm start: seed from the last saved snapshot so the first poll
+        # only reports (and writes) what changed while we were down
+        sync = cls(api, auction_id, snapshot=snapshot, **kwargs)
+        now_wall, now = time.time(), sync.clock()
+        for lot, updated_at in snapshot.load_with_times(auction_id):
+            sync.seed([lot], seen_at=now - (now_wall - updated_at))
+        return sync
+
+    @property
+    def done(self):
+        return not self.page_due
+
+    def seed(self, lots, seen_at=None):
+        # preload state (e.g. from a snapshot) so the first poll only
+        # reports lots that changed since then
+        seen_at = self.clock() if seen_at is None else seen_at
+        for lot in lots:
+            self.last_seen[lot["id"]] = self._state(lot, seen_at)
+
+    def next_poll_at(self):
+        return min(self.page_due.values()) if self.page_due else None
+
+    def _state(self, lot, now):
+        state = lot.get("lotState") or {}
+        return (state.get("bidCount"), state.get("highBid"), state.get("isClosed"), state.get("timeLeftSeconds"), now)
+
+    def _changed(self, previous, current):
+        if previous is None:
+            return True
+        if previous[:3] != current[:3]:
+            return True
+        if previous[3] is None or current[3] is None:
+            return previous[3] != current[3]
+        expected = previous[3] - (current[4] - previous[4])
+        return abs(current[3] - expected) > self.drift_tolerance
+
+    def _interval(self, lots):
+        open_left = [
+            lot["lotState"]["timeLeftSeconds"] for lot in lots
+            if lot.get("lotState") and not lot["lotState"].get("isClosed")
+            and lot["lotState"].get("timeLeftSeconds") is not None
+        ]
+        if not open_left:
+            return None
+        return min(self.max_interval, max(self.min_interval, min(open_left) * self.interval_fraction))
+
+    def _fetch(self, page_number):
+        return page_number, self.api.search_auction_products(self.auction_id, page_number=page_number,
+                                                             page_length=self.page_length, fields=self.fields)
+
+    def poll(self):
+        now = self.clock()
+        due = sorted(page for page, at in self.page_due.items() if at <= now)
+        if not due:
+            return []
+
+        if self.max_workers > 1 and len(due) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pages = list(executor.map(self._fetch, due))
+        else:
+            pages = [self._fetch(page) for page in due]
+
+        changed = []
+        for page_number, data in pages:
+            results = data['pagedResults']['results']
+            seen_at = self.clock()
+            for lot in results:
+                current = self._state(lot, seen_at)
+                if self._changed(self.last_seen.get(lot["id"]), current):
+                    changed.append(lot)
+                self.last_seen[lot["id"]] = current
+
+            interval = self._interval(results)
+            if interval is None:
+                self.page_due.pop(page_number, None)
+            else:
+                self.page_due[page_number] = seen_at + interval
+
+            # first poll (or a growing auction) reveals more pages; they are
+            # due immediately
+            page_count = -(-data['pagedResults']['filteredCount'] // self.page_length)
+            for new_page in range(self.page_count + 1, page_count + 1):
+                self.page_due[new_page] = 0.0
+            self.page_count = max(self.page_count, page_count)
+
+        if self.snapshot is not None and changed:
+            # slim lots: keep the fields a full crawl stored
+            self.snapshot.save(changed, self.auction_id, merge=True)
+        return changed
+
+    def run(self, stop_after=None):
+        # yields each non-empty batch of changed lots until every lot has
+        # closed (or stop_after seconds have passed)
+        deadline = None if stop_after is None else self.clock() + stop_after
+        while not self.done:
+            changed = self.poll()
+            if changed:
+                yield changed
+            next_at = self.next_poll_at()
+            if next_at is None or (deadline is not None and next_at > deadline):
+                return
+            delay = next_at - self.clock()
+            if delay > 0:
+                time.sleep(delay)